@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the sender hot paths, with baseline save/compare.
+
+Cases (each at several sizes):
+  sentbackend          haversine_m, initial_bearing_deg, PathCursor.step
+                       (waypoint counts), drone_state serialization as done
+                       by message_generator (drone counts)
+  pi_ws_two_messages   compute_bbox_and_conf, generate_objects_for_frame
+                       (drone counts), load_and_resize (image resolutions,
+                       generated test images)
+
+The pi cases need OpenCV and numpy; they are skipped when those are missing.
+Everything runs offline. Timings are the best of --repeat runs, reported per
+operation.
+
+Usage examples:
+  python3 bench_hotpaths.py --save-baseline bench-baseline.json
+  python3 bench_hotpaths.py --compare bench-baseline.json --threshold 0.15
+  python3 bench_hotpaths.py --filter generate_objects --repeat 9
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import timeit
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+import sentbackend as sb
+
+DRONE_COUNTS = (1, 10, 100, 1000)
+WAYPOINT_COUNTS = (5, 100, 1000)
+RESOLUTIONS = ((640, 480), (1280, 720), (1920, 1080), (3840, 2160))
+SEED = 1234
+
+
+@dataclass
+class Case:
+    name: str
+    ops: int  # operations per call of fn
+    fn: Callable[[], object]
+
+
+def sentbackend_cases() -> List[Case]:
+    rng = random.Random(SEED)
+    points = [(13.75 + rng.uniform(-0.05, 0.05), 100.5 + rng.uniform(-0.05, 0.05)) for _ in range(1000)]
+    pairs = list(zip(points, points[1:] + points[:1]))
+
+    def run_haversine():
+        for (lat1, lon1), (lat2, lon2) in pairs:
+            sb.haversine_m(lat1, lon1, lat2, lon2)
+
+    def run_bearing():
+        for (lat1, lon1), (lat2, lon2) in pairs:
+            sb.initial_bearing_deg(lat1, lon1, lat2, lon2)
+
+    cases = [
+        Case("haversine_m", len(pairs), run_haversine),
+        Case("initial_bearing_deg", len(pairs), run_bearing),
+    ]
+
+    for count in WAYPOINT_COUNTS:
+        # Waypoints roughly 50 m apart; 1 s steps at 12 m/s change segment every few steps
+        waypoints = [sb.Waypoint(13.75 + 0.00045 * i, 100.5 + 0.0002 * (i % 7)) for i in range(count)]
+
+        def run_step(waypoints=waypoints):
+            # Fresh cursor per call so every run walks the same segments
+            cursor = sb.PathCursor(waypoints, 12.0)
+            for _ in range(1000):
+                cursor.step(1.0)
+
+        cases.append(Case(f"PathCursor.step[waypoints={count}]", 1000, run_step))
+
+    for count in DRONE_COUNTS:
+        cursors = [sb.PathCursor(sb.default_loop(13.75 + 0.001 * i, 100.5), 8.0) for i in range(count)]
+
+        # One message_generator tick per drone, without its sleep
+        def run_serialize(cursors=cursors):
+            for i, cursor in enumerate(cursors):
+                lat, lon, heading = cursor.step(1.0)
+                json.dumps(sb.drone_state_message(f"drone{i}", lat, lon, 50.0, 8.0, heading, 90.0, True, 0.0))
+
+        cases.append(Case(f"drone_state.serialize[drones={count}]", count, run_serialize))
+    return cases
+
+
+def pi_cases(image_dir: str) -> List[Case]:
+    try:
+        import cv2  # type: ignore
+        import numpy as np  # type: ignore
+        import pi_ws_two_messages as pi
+    except ImportError as e:
+        print(f"[bench] skipping pi_ws_two_messages cases: {e}")
+        return []
+
+    rng = random.Random(SEED)
+    offsets = [(rng.uniform(-600, 600), rng.uniform(-600, 600), rng.uniform(3, 12)) for _ in range(1000)]
+
+    def run_bbox():
+        for dx, dy, speed in offsets:
+            pi.compute_bbox_and_conf(dx, dy, speed, 1280, 720)
+
+    cases = [Case("compute_bbox_and_conf", len(offsets), run_bbox)]
+
+    for count in DRONE_COUNTS:
+        random.seed(SEED)
+        states = pi.init_frames_states(count, 13.7563, 100.5018, 120.0, 120.0, 5.0, 3.0, 12.0)
+
+        def run_generate(states=states):
+            pi.generate_objects_for_frame(
+                states=states,
+                dt=0.1,
+                center_lat=13.7563,
+                center_lon=100.5018,
+                image_width=1280,
+                image_height=720,
+                noise_level_m=3.0,
+                miss_rate=0.1,
+                false_positive_rate=0.03,
+                base_altitude_m=120.0,
+                source_id="bench",
+            )
+
+        cases.append(Case(f"generate_objects_for_frame[drones={count}]", 1, run_generate))
+
+    np_rng = np.random.default_rng(SEED)
+    for width, height in RESOLUTIONS:
+        # Smooth gradient plus noise: compresses like a camera frame, not like pure noise
+        x = np.linspace(0, 255, width, dtype=np.float32)
+        y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+        base = (x[None, :] * 0.6 + y * 0.4)[:, :, None].repeat(3, axis=2)
+        noise = np_rng.normal(0, 12, size=(height, width, 3))
+        image = np.clip(base + noise, 0, 255).astype(np.uint8)
+        path = os.path.join(image_dir, f"bench_{width}x{height}.jpg")
+        cv2.imwrite(path, image, [int(cv2.IMWRITE_JPEG_QUALITY), 90])
+
+        def run_load(path=path):
+            pi.load_and_resize(path, pi.TARGET_HEIGHT, pi.JPEG_QUALITY)
+
+        cases.append(Case(f"load_and_resize[{width}x{height}]", 1, run_load))
+    return cases
+
+
+def measure(case: Case, repeat: int, min_time_s: float) -> dict:
+    timer = timeit.Timer(case.fn)
+    loops, elapsed = timer.autorange()
+    if elapsed < min_time_s:
+        loops = max(1, int(loops * min_time_s / max(elapsed, 1e-9)))
+    runs = timer.repeat(repeat=repeat, number=loops)
+    per_op = sorted(r / (loops * case.ops) for r in runs)
+    return {
+        "best_us": round(per_op[0] * 1e6, 4),
+        "median_us": round(per_op[len(per_op) // 2] * 1e6, 4),
+        "ops_per_s": round(1.0 / per_op[0], 1) if per_op[0] > 0 else 0.0,
+        "loops": loops,
+        "ops": case.ops,
+    }
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    """Print a comparison against the baseline; return the names that regressed."""
+    regressions = []
+    for name, res in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"[bench] {name:<44} {res['best_us']:>12.3f}us   (new)")
+            continue
+        ratio = res["best_us"] / base["best_us"] if base["best_us"] > 0 else 1.0
+        flag = ""
+        if ratio > 1.0 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif ratio < 1.0 - threshold:
+            flag = "  faster"
+        print(f"[bench] {name:<44} {res['best_us']:>12.3f}us vs {base['best_us']:>12.3f}us  x{ratio:.2f}{flag}")
+    return regressions
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="Micro-benchmarks for the sender hot paths")
+    p.add_argument("--filter", default=None, help="Only run cases whose name contains this text")
+    p.add_argument("--repeat", type=int, default=5, help="Timed runs per case (best is reported)")
+    p.add_argument("--min-time", type=float, default=0.2, help="Minimum seconds per timed run")
+    p.add_argument("--save-baseline", default=None, help="Write results to this JSON file")
+    p.add_argument("--compare", default=None, help="Compare against this baseline JSON file")
+    p.add_argument("--threshold", type=float, default=0.2, help="Relative slowdown that counts as a regression")
+    return p
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    results: Dict[str, dict] = {}
+    with tempfile.TemporaryDirectory(prefix="bench_img_") as image_dir:
+        cases = sentbackend_cases() + pi_cases(image_dir)
+        if args.filter:
+            cases = [c for c in cases if args.filter in c.name]
+        for case in cases:
+            random.seed(SEED)
+            results[case.name] = measure(case, args.repeat, args.min_time)
+            if not args.compare:
+                res = results[case.name]
+                print(f"[bench] {case.name:<44} {res['best_us']:>12.3f}us/op  {res['ops_per_s']:>14.0f} ops/s")
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        regressions = compare(results, baseline.get("results", {}), args.threshold)
+        if regressions:
+            print(f"[bench] {len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}")
+            exit_code = 1
+        else:
+            print(f"[bench] no regressions beyond {args.threshold:.0%}")
+
+    if args.save_baseline:
+        data = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "results": results,
+        }
+        with open(args.save_baseline, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, indent=2)
+        print(f"[bench] baseline written to {args.save_baseline}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,183 @@
+"""
+Client side of the hub's credit-based flow control (see src/ws/hub.ts).
+
+The hub announces a ``credit_window`` in its hello message. Every message a
+sender pushes (frame_meta JSON, JPEG binary, drone_state JSON) consumes one
+credit, and every ``ack``/``nack`` the hub returns gives one back. Senders
+that respect the window never have more than ``credit_window`` messages
+waiting on the hub's database writes. An ``ack`` with ``ok: false`` (the hub
+could not validate or persist the message) is counted as a failure.
+
+Hubs that predate the protocol send a hello without ``credit_window``; the
+window then stays unlimited so the senders behave exactly as before.
+
+asyncio (``websockets``) senders read the hub's messages from a task that
+runs for the whole connection, not only while they wait for credit: the
+library stops reading the socket, keepalive pongs included, once
+``max_queue`` received messages are left unread.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from typing import Optional
+
+
+class CreditWindow:
+    """Track in-flight messages against the window granted by the hub."""
+
+    def __init__(self, hello_timeout_s: float = 2.0):
+        self._cond = threading.Condition()
+        self._created = time.monotonic()
+        self._stall_started: Optional[float] = None
+        self.hello_timeout_s = hello_timeout_s
+        self.configured = False
+        self.window: Optional[int] = None  # None = unlimited
+        self.in_flight = 0
+        self.acked = 0
+        self.nacked = 0
+        self.failed = 0
+        self.stalls = 0
+        self.stall_s = 0.0
+        # asyncio senders only: reader task and "something arrived" signal
+        self._reader: Optional[asyncio.Task] = None
+        self._changed: Optional[asyncio.Event] = None
+        self.reader_error: Optional[BaseException] = None
+
+    def configure(self, window: Optional[int]) -> None:
+        with self._cond:
+            self.configured = True
+            self.window = int(window) if window else None
+            self._cond.notify_all()
+
+    def feed(self, raw) -> Optional[dict]:
+        """Handle one message received from the hub. Returns the parsed JSON (or None)."""
+        if isinstance(raw, (bytes, bytearray)):
+            return None
+        try:
+            msg = json.loads(raw)
+        except (TypeError, ValueError):
+            return None
+        if not isinstance(msg, dict):
+            return None
+        kind = msg.get("type")
+        if self._changed is not None:
+            self._changed.set()
+        if kind == "hello":
+            self.configure(msg.get("credit_window"))
+        elif kind in ("ack", "nack"):
+            with self._cond:
+                self.in_flight = max(0, self.in_flight - 1)
+                if kind == "nack":
+                    self.nacked += 1
+                elif msg.get("ok") is False:
+                    self.failed += 1
+                else:
+                    self.acked += 1
+                self._cond.notify_all()
+        return msg
+
+    def try_acquire(self, n: int = 1) -> bool:
+        """Take ``n`` credits if available; never blocks."""
+        with self._cond:
+            return self._try_acquire_locked(n)
+
+    def acquire(self, n: int = 1, timeout: Optional[float] = None) -> bool:
+        """Block until ``n`` credits are available (for threaded senders)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while not self._try_acquire_locked(n):
+                wait = 0.5
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    wait = min(wait, remaining)
+                self._cond.wait(wait)
+            return True
+
+    def _try_acquire_locked(self, n: int) -> bool:
+        now = time.monotonic()
+        if not self.configured and now - self._created >= self.hello_timeout_s:
+            # No hello from the hub; behave like the pre-flow-control senders.
+            self.configured = True
+        if not self.configured:
+            return False  # waiting for hello is not a stall
+        if self.window is None:
+            ok = True
+        else:
+            ok = self.in_flight + n <= self.window
+        if not ok:
+            if self._stall_started is None:
+                self._stall_started = now
+                self.stalls += 1
+            return False
+        if self._stall_started is not None:
+            self.stall_s += now - self._stall_started
+            self._stall_started = None
+        if self.window is not None:
+            self.in_flight += n
+        return True
+
+    def summary(self) -> dict:
+        with self._cond:
+            stall_s = self.stall_s
+            if self._stall_started is not None:
+                stall_s += time.monotonic() - self._stall_started
+            return {
+                "window": self.window,
+                "in_flight": self.in_flight,
+                "acked": self.acked,
+                "nacked": self.nacked,
+                "failed": self.failed,
+                "stalls": self.stalls,
+                "stall_s": round(stall_s, 3),
+            }
+
+    def format_stats(self) -> str:
+        s = self.summary()
+        window = "unlimited" if s["window"] is None else s["window"]
+        return (
+            f"window={window} in_flight={s['in_flight']} acked={s['acked']} "
+            f"nacked={s['nacked']} failed={s['failed']} stalls={s['stalls']} stall={s['stall_s']:.2f}s"
+        )
+
+
+    def attach_async(self, ws) -> None:
+        """Start feeding every message received on ``ws`` (``websockets``) into the window."""
+        if self._reader is None:
+            self._changed = asyncio.Event()
+            self._reader = asyncio.ensure_future(self._read_async(ws))
+
+    async def _read_async(self, ws) -> None:
+        try:
+            async for raw in ws:
+                self.feed(raw)
+        except Exception as e:  # connection lost; the waiting sender raises it
+            self.reader_error = e
+        finally:
+            self._changed.set()
+
+    async def acquire_async(self, ws, poll_s: float = 0.5) -> None:
+        """asyncio variant of acquire; acks are read from ``ws`` by a background task."""
+        self.attach_async(ws)
+        while not self.try_acquire():
+            if self._reader.done():
+                raise ConnectionError(f"connection closed while waiting for credit: {self.reader_error}")
+            self._changed.clear()
+            # asyncio.wait instead of wait_for: on 3.11 and older, wait_for can swallow a
+            # cancellation (Ctrl+C) that lands just as the wait completes.
+            changed = asyncio.ensure_future(self._changed.wait())
+            try:
+                await asyncio.wait({changed}, timeout=poll_s)
+            finally:
+                changed.cancel()
+
+
+async def wait_for_credit_async(ws, window: Optional[CreditWindow], poll_s: float = 0.5) -> None:
+    """Wait until ``window`` grants a credit for ``ws``; starts its ack reader on first use."""
+    if window is None:
+        return
+    await window.acquire_async(ws, poll_s)
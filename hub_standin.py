@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""
+Lightweight stand-in for the TESA hub, for benchmarking the senders offline.
+
+Speaks the /ws?role=pi|front protocol of src/ws/hub.ts without Fastify,
+Postgres or MQTT:
+  - sends {"type": "hello", ..., "credit_window": N} on connect
+  - pairs each frame_meta with the binary that follows it (FIFO per socket)
+  - acks every message once its simulated persistence finishes, nacks
+    messages beyond the credit window
+  - relays frame_meta + JPEG and drone_state to role=front clients
+  - optionally runs a minimal MQTT 3.1.1 sink (CONNECT/PUBLISH/SUBSCRIBE/PING)
+    that counts publishes per topic and acks QoS 1/2 (dropped ones too)
+
+Persistence is simulated with --latency-ms/--jitter-ms, throughput caps
+(--max-msgs-per-s, --max-bytes-per-s, --db-concurrency) and --drop-rate
+(message acked with ok=false). Received rates and pairing errors are printed
+every --report-interval seconds.
+
+Usage examples:
+  python3 hub_standin.py --port 3000 --latency-ms 20 --credit-window 16
+  python3 hub_standin.py --latency-ms 200 --max-msgs-per-s 500 --mqtt-port 1883
+
+  # then point any sender at it
+  python3 sentbackend.py --url ws://127.0.0.1:3000/ws?role=pi
+  python3 loadgen.py drones --url ws://127.0.0.1:3000/ws?role=pi --workers 4 --duration 30
+
+Requires: websockets (pip install websockets)
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Deque, Optional, Set
+from urllib.parse import parse_qs, urlsplit
+
+FRONT_MAX_BUFFER = 2 * 1024 * 1024
+MAX_PENDING_METAS = 64  # metas awaiting their binary when no credit window is set
+
+
+class RateLimiter:
+    """Token bucket; acquire(n) waits until n tokens are available. rate <= 0 disables it."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        if self.rate <= 0:
+            return
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                # Requests larger than the bucket go through once it is full
+                if self.tokens >= min(amount, self.rate):
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((min(amount, self.rate) - self.tokens) / self.rate)
+
+
+@dataclass
+class Stats:
+    texts: int = 0
+    binaries: int = 0
+    bytes: int = 0
+    acks: int = 0
+    failed: int = 0
+    nacks: int = 0
+    binary_without_meta: int = 0
+    meta_without_binary: int = 0
+    invalid: int = 0
+    relayed: int = 0
+    front_skipped: int = 0
+    mqtt_publishes: int = 0
+    mqtt_bytes: int = 0
+    mqtt_dropped: int = 0
+    mqtt_topics: Counter = field(default_factory=Counter)
+
+    def snapshot(self) -> dict:
+        data = {k: v for k, v in vars(self).items() if k != "mqtt_topics"}
+        data["mqtt_topics"] = dict(self.mqtt_topics)
+        return data
+
+
+@dataclass
+class Pending:
+    meta: dict
+    raw: str
+    persisted: asyncio.Future
+
+
+@dataclass(eq=False)
+class Client:
+    ws: object
+    role: str
+    in_flight: int = 0
+    skip_next_binary: bool = False
+    pending: Deque[Pending] = field(default_factory=deque)
+
+
+class StandinHub:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.stats = Stats()
+        self.fronts: Set[Client] = set()
+        self.pis = 0
+        self.db = asyncio.Semaphore(max(1, args.db_concurrency))
+        self.msg_limiter = RateLimiter(args.max_msgs_per_s)
+        self.byte_limiter = RateLimiter(args.max_bytes_per_s)
+
+    # ---- simulated persistence ----
+
+    async def persist(self, size: int) -> bool:
+        """Pretend to write one message; returns False for a simulated failure."""
+        await self.msg_limiter.acquire(1)
+        await self.byte_limiter.acquire(size)
+        async with self.db:
+            latency = self.args.latency_ms + random.uniform(-self.args.jitter_ms, self.args.jitter_ms)
+            if latency > 0:
+                await asyncio.sleep(latency / 1000.0)
+        return random.random() >= self.args.drop_rate
+
+    async def send_json(self, client: Client, payload: dict) -> None:
+        try:
+            await client.ws.send(json.dumps(payload))
+        except Exception:
+            pass
+
+    async def settle(self, client: Client, ack: dict) -> None:
+        client.in_flight = max(0, client.in_flight - 1)
+        if ack.get("ok"):
+            self.stats.acks += 1
+        else:
+            self.stats.failed += 1
+        await self.send_json(client, {"type": "ack", **ack})
+
+    # ---- relay ----
+
+    async def relay(self, message) -> None:
+        for front in list(self.fronts):
+            transport = getattr(front.ws, "transport", None)
+            if transport is not None and transport.get_write_buffer_size() > FRONT_MAX_BUFFER:
+                self.stats.front_skipped += 1
+                continue
+            try:
+                await front.ws.send(message)
+                self.stats.relayed += 1
+            except Exception:
+                self.fronts.discard(front)
+
+    # ---- message handling (mirrors src/ws/hub.ts) ----
+
+    def credit_window(self) -> Optional[int]:
+        return self.args.credit_window if self.args.credit_window > 0 else None
+
+    async def on_message(self, client: Client, data) -> None:
+        is_binary = isinstance(data, (bytes, bytearray))
+        if is_binary:
+            self.stats.binaries += 1
+        else:
+            self.stats.texts += 1
+        self.stats.bytes += len(data)
+
+        if is_binary and client.skip_next_binary:
+            client.skip_next_binary = False
+            self.stats.nacks += 1
+            await self.send_json(client, {"type": "nack", "kind": "frame_binary", "reason": "meta_dropped"})
+            return
+        if not is_binary:
+            client.skip_next_binary = False
+
+        window = self.credit_window()
+        if window is not None and client.in_flight >= window:
+            self.stats.nacks += 1
+            if is_binary:
+                if client.pending:
+                    client.pending.popleft()
+            else:
+                client.skip_next_binary = True
+            await self.send_json(client, {
+                "type": "nack",
+                "kind": "frame_binary" if is_binary else "message",
+                "reason": "window_exceeded",
+            })
+            return
+        client.in_flight += 1
+
+        if is_binary:
+            # Pair with the oldest meta now, before any later meta can be queued
+            pending = client.pending.popleft() if client.role == "pi" and client.pending else None
+            asyncio.create_task(self.on_binary(client, bytes(data), pending))
+        else:
+            self.on_text(client, data)
+
+    def on_text(self, client: Client, raw: str) -> None:
+        try:
+            msg = json.loads(raw)
+        except ValueError:
+            self.stats.invalid += 1
+            asyncio.create_task(self.settle(client, {"kind": "unknown", "ok": False}))
+            return
+        kind = msg.get("kind") if isinstance(msg, dict) else None
+        if kind == "frame_meta" and client.role == "pi":
+            if not all(k in msg for k in ("frame_id", "timestamp", "source_id", "image_info", "objects")):
+                self.stats.invalid += 1
+                asyncio.create_task(self.settle(client, {"kind": "frame_meta", "ok": False}))
+                return
+            pending = Pending(msg, raw, asyncio.get_running_loop().create_future())
+            client.pending.append(pending)
+            if len(client.pending) > (self.credit_window() or MAX_PENDING_METAS):
+                # the oldest meta never got its binary
+                self.stats.meta_without_binary += 1
+                client.pending.popleft()
+            asyncio.create_task(self.on_frame_meta(client, pending))
+        elif kind == "drone_state":
+            asyncio.create_task(self.on_drone_state(client, msg, raw))
+        else:
+            self.stats.invalid += 1
+            asyncio.create_task(self.settle(client, {"kind": kind or "unknown", "ok": False}))
+
+    async def on_frame_meta(self, client: Client, pending: Pending) -> None:
+        ok = await self.persist(len(pending.raw))
+        pending.persisted.set_result(ok)
+        ids = {"source_id": pending.meta.get("source_id"), "frame_id": pending.meta.get("frame_id")}
+        if ok:
+            await self.relay(pending.raw)
+        await self.settle(client, {"kind": "frame_meta", "ok": ok, **ids})
+
+    async def on_binary(self, client: Client, data: bytes, pending: Optional[Pending]) -> None:
+        if pending is None:
+            self.stats.binary_without_meta += 1
+            await self.settle(client, {"kind": "frame_binary", "ok": False})
+            return
+        ids = {"source_id": pending.meta.get("source_id"), "frame_id": pending.meta.get("frame_id")}
+        meta_ok = await pending.persisted
+        if not meta_ok:
+            await self.settle(client, {"kind": "frame_binary", "ok": False, **ids})
+            return
+        ok = await self.persist(len(data))
+        await self.relay(data)
+        await self.settle(client, {"kind": "frame_binary", "ok": ok, **ids})
+
+    async def on_drone_state(self, client: Client, msg: dict, raw: str) -> None:
+        ok = await self.persist(len(raw))
+        if ok:
+            await self.relay(raw)
+        await self.settle(client, {"kind": "drone_state", "ok": ok, "droneId": msg.get("droneId")})
+
+    async def handler(self, ws, path: Optional[str] = None) -> None:
+        if path is None:
+            request = getattr(ws, "request", None)
+            path = request.path if request is not None else getattr(ws, "path", "/")
+        url = urlsplit(path)
+        if url.path != "/ws":
+            await ws.close(code=1008, reason="unknown path")
+            return
+        role = (parse_qs(url.query).get("role") or ["unknown"])[0]
+        role = role if role in ("pi", "front") else "unknown"
+        client = Client(ws=ws, role=role)
+        hello = {"type": "hello", "role": role, "ok": True}
+        if role != "front" and self.credit_window() is not None:
+            hello["credit_window"] = self.credit_window()
+        await self.send_json(client, hello)
+
+        if role == "front":
+            self.fronts.add(client)
+        else:
+            self.pis += 1
+        try:
+            async for data in ws:
+                if role != "front":
+                    await self.on_message(client, data)
+        except Exception:
+            pass
+        finally:
+            if role == "front":
+                self.fronts.discard(client)
+            else:
+                self.pis -= 1
+                self.stats.meta_without_binary += len(client.pending)
+                client.pending.clear()
+
+    # ---- minimal MQTT sink ----
+
+    async def mqtt_ack(
+        self,
+        writer: asyncio.StreamWriter,
+        qos: int,
+        packet_id: bytes,
+        size: int,
+        previous: Optional[asyncio.Task],
+    ) -> None:
+        """Ack one publish once it is "persisted", in arrival order as MQTT requires.
+
+        Dropped publishes are still acked (and counted): clients only resend
+        QoS 1/2 publishes after a reconnect, so withholding the ack would pin
+        one of their in-flight slots for good.
+        """
+        ok = await self.persist(size)
+        if previous is not None:
+            await previous
+        if not ok:
+            self.stats.mqtt_dropped += 1
+        writer.write((b"\x40\x02" if qos == 1 else b"\x50\x02") + packet_id)
+
+    async def mqtt_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        last_ack: Optional[asyncio.Task] = None
+        try:
+            while True:
+                header = await reader.readexactly(1)
+                length, multiplier = 0, 1
+                while True:
+                    byte = (await reader.readexactly(1))[0]
+                    length += (byte & 0x7F) * multiplier
+                    multiplier *= 128
+                    if not byte & 0x80:
+                        break
+                body = await reader.readexactly(length) if length else b""
+                ptype, flags = header[0] >> 4, header[0] & 0x0F
+                if ptype == 1:  # CONNECT
+                    writer.write(b"\x20\x02\x00\x00")
+                elif ptype == 3:  # PUBLISH
+                    qos = (flags >> 1) & 0x03
+                    topic_len = int.from_bytes(body[0:2], "big")
+                    topic = body[2:2 + topic_len].decode("utf-8", "replace")
+                    offset = 2 + topic_len
+                    packet_id = body[offset:offset + 2] if qos else b""
+                    payload_len = len(body) - offset - len(packet_id)
+                    self.stats.mqtt_publishes += 1
+                    self.stats.mqtt_bytes += payload_len
+                    self.stats.mqtt_topics[topic] += 1
+                    if qos:
+                        # Persist concurrently (up to --db-concurrency), ack in order
+                        last_ack = asyncio.create_task(self.mqtt_ack(writer, qos, packet_id, payload_len, last_ack))
+                elif ptype == 6:  # PUBREL
+                    writer.write(b"\x70\x02" + body[0:2])
+                elif ptype == 8:  # SUBSCRIBE
+                    packet_id, topics, offset = body[0:2], 0, 2
+                    while offset < len(body):
+                        offset += 2 + int.from_bytes(body[offset:offset + 2], "big") + 1
+                        topics += 1
+                    writer.write(bytes([0x90, 2 + topics]) + packet_id + b"\x00" * topics)
+                elif ptype == 12:  # PINGREQ
+                    writer.write(b"\xd0\x00")
+                elif ptype == 14:  # DISCONNECT
+                    break
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    # ---- reporting ----
+
+    async def report(self) -> None:
+        prev = self.stats.snapshot()
+        prev_t = time.monotonic()
+        while True:
+            await asyncio.sleep(self.args.report_interval)
+            now = time.monotonic()
+            cur = self.stats.snapshot()
+            dt = max(1e-6, now - prev_t)
+
+            def rate(key: str) -> float:
+                return (cur[key] - prev[key]) / dt
+
+            line = (
+                f"[standin] pi={self.pis} front={len(self.fronts)} "
+                f"text/s={rate('texts'):.0f} bin/s={rate('binaries'):.0f} MB/s={rate('bytes') / 1e6:.2f} "
+                f"ack/s={rate('acks'):.0f} nacks={cur['nacks']} failed={cur['failed']} "
+                f"pairing_errors={cur['binary_without_meta'] + cur['meta_without_binary']} invalid={cur['invalid']}"
+            )
+            if self.args.mqtt_port:
+                line += f" mqtt/s={rate('mqtt_publishes'):.0f} mqtt_dropped={cur['mqtt_dropped']}"
+            print(line, flush=True)
+            prev, prev_t = cur, now
+
+
+async def serve(args: argparse.Namespace) -> None:
+    import websockets  # type: ignore
+
+    hub = StandinHub(args)
+    servers = []
+    ws_server = await websockets.serve(hub.handler, args.host, args.port, max_size=15 * 1024 * 1024)  # type: ignore
+    servers.append(ws_server)
+    print(f"[standin] WS listening on ws://{args.host}:{args.port}/ws (credit_window={hub.credit_window() or 'unlimited'})")
+    if args.mqtt_port:
+        mqtt_server = await asyncio.start_server(hub.mqtt_client, args.host, args.mqtt_port)
+        servers.append(mqtt_server)
+        print(f"[standin] MQTT sink listening on {args.host}:{args.mqtt_port}")
+    reporter = asyncio.create_task(hub.report())
+    try:
+        await asyncio.Future()
+    finally:
+        reporter.cancel()
+        for server in servers:
+            server.close()
+        if args.summary:
+            with open(args.summary, "w", encoding="utf-8") as fh:
+                json.dump(hub.stats.snapshot(), fh, indent=2)
+            print(f"[standin] summary written to {args.summary}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="Offline stand-in for the TESA WS hub (and an optional MQTT sink)")
+    p.add_argument("--host", default="127.0.0.1", help="Bind address")
+    p.add_argument("--port", type=int, default=3000, help="WS port (path /ws)")
+    p.add_argument("--credit-window", type=int, default=16, help="Credits granted in hello (0 = no flow control)")
+    p.add_argument("--latency-ms", type=float, default=0.0, help="Simulated persistence latency per message")
+    p.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform +- jitter added to --latency-ms")
+    p.add_argument("--db-concurrency", type=int, default=16, help="Messages persisted concurrently")
+    p.add_argument("--max-msgs-per-s", type=float, default=0.0, help="Persistence throughput cap (0 = none)")
+    p.add_argument("--max-bytes-per-s", type=float, default=0.0, help="Persistence byte-rate cap (0 = none)")
+    p.add_argument("--drop-rate", type=float, default=0.0, help="Probability a message fails to persist (acked ok=false)")
+    p.add_argument("--mqtt-port", type=int, default=0, help="Also run a minimal MQTT sink on this port (0 = off)")
+    p.add_argument("--report-interval", type=float, default=1.0, help="Seconds between stats lines")
+    p.add_argument("--summary", default=None, help="Write final counters as JSON to this file on exit")
+    return p
+
+
+def main() -> int:
+    args = build_parser().parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Multi-process load generator for the TESA hub.
+
+One Python process is bound to one core for JSON serialization, simulation and
+JPEG work, so this script shards a scenario across worker processes:
+
+  drones   N simulated drones sending drone_state (the sentbackend.py payload)
+           over C WebSocket connections. Connections are split across workers,
+           drones across connections.
+  sources  The sources of a pi_ws_two_messages.py --sources-config file, split
+           across workers. Everything after "--" is passed to that script's
+           argument parser (--sim, --shared-world, ... apply per worker).
+
+Workers write counters into a shared-memory array; the coordinator prints the
+combined live send rate, bytes/sec, errors and reconnects, and writes a JSON
+summary when the run ends (--duration or Ctrl+C).
+
+Usage examples:
+  python3 loadgen.py drones --url ws://127.0.0.1:3000/ws?role=pi \\
+    --drones 500 --connections 20 --interval 0.2 --workers 4 --duration 60
+
+  python3 loadgen.py sources --workers 2 --duration 60 -- \\
+    --sources-config sources.json --sim --num-drones 50
+
+Requires: websockets (pip install websockets); sources mode also needs OpenCV.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import multiprocessing as mp
+import os
+import random
+import sys
+import time
+from typing import List, Optional
+
+from flow_control import CreditWindow, wait_for_credit_async
+from sender_transport import Backoff
+
+# Per-worker counters in the shared array (one row per worker, one writer per row)
+FIELDS = ("messages", "bytes", "errors", "reconnects", "stall_s")
+NUM_FIELDS = len(FIELDS)
+
+
+class WorkerCounters:
+    """View on one worker's row of the shared counter array."""
+
+    def __init__(self, shared, index: int):
+        self.shared = shared
+        self.base = index * NUM_FIELDS
+
+    def add(self, field: str, value: float = 1.0) -> None:
+        self.shared[self.base + FIELDS.index(field)] += value
+
+    def set(self, field: str, value: float) -> None:
+        self.shared[self.base + FIELDS.index(field)] = value
+
+
+def read_totals(shared, workers: int) -> dict:
+    totals = {name: 0.0 for name in FIELDS}
+    for w in range(workers):
+        for i, name in enumerate(FIELDS):
+            totals[name] += shared[w * NUM_FIELDS + i]
+    return totals
+
+
+def read_worker(shared, index: int) -> dict:
+    return {name: shared[index * NUM_FIELDS + i] for i, name in enumerate(FIELDS)}
+
+
+# ---- drones scenario ----
+
+
+def shard(items: list, index: int, count: int) -> list:
+    return items[index::count]
+
+
+async def drone_connection(
+    url: str,
+    drone_ids: List[str],
+    args: argparse.Namespace,
+    counters: WorkerCounters,
+    stall_by_conn: dict,
+) -> None:
+    """One connection sending drone_state for its drones every --interval seconds."""
+    import websockets  # type: ignore
+    from sentbackend import PathCursor, default_loop, drone_state_message
+
+    rng = random.Random()
+    cursors = {}
+    for drone_id in drone_ids:
+        # Spread drones over roughly +-1 km around the start point
+        lat = args.start_lat + rng.uniform(-0.01, 0.01)
+        lon = args.start_lon + rng.uniform(-0.01, 0.01)
+        cursors[drone_id] = PathCursor(default_loop(lat, lon), args.speed)
+    battery = {drone_id: 100.0 for drone_id in drone_ids}
+
+    loop = asyncio.get_running_loop()
+    # Jittered backoff so restarting the hub doesn't bring every connection back at once
+    backoff = Backoff()
+    while True:
+        try:
+            async with websockets.connect(url, ping_interval=20, ping_timeout=10) as ws:  # type: ignore
+                backoff.reset()
+                window = CreditWindow()
+                stall_by_conn[id(ws)] = window
+                next_due = loop.time()
+                last = time.monotonic()
+                while True:
+                    now = time.monotonic()
+                    dt, last = now - last, now
+                    for drone_id in drone_ids:
+                        lat, lon, heading = cursors[drone_id].step(dt)
+                        battery[drone_id] = max(0.0, battery[drone_id] - args.battery_drain * dt)
+                        text = json.dumps(
+                            drone_state_message(
+                                drone_id, lat, lon, args.alt, args.speed, heading,
+                                battery[drone_id], True, 0.0,
+                            )
+                        )
+                        await wait_for_credit_async(ws, window)
+                        await ws.send(text)
+                        counters.add("messages")
+                        counters.add("bytes", len(text))
+                    next_due += args.interval
+                    delay = next_due - loop.time()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    else:
+                        next_due = loop.time()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            counters.add("errors")
+        counters.add("reconnects")
+        await asyncio.sleep(backoff.next_delay())
+
+
+async def run_drones_worker(index: int, count: int, args: argparse.Namespace, counters: WorkerCounters) -> None:
+    drone_ids = [f"load-{i + 1}" for i in range(args.drones)]
+    connections = list(range(args.connections))
+    mine = shard(connections, index, count)
+    stall_by_conn: dict = {}
+    tasks = []
+    for conn in mine:
+        ids = shard(drone_ids, conn, args.connections)
+        if ids:
+            tasks.append(asyncio.create_task(drone_connection(args.url, ids, args, counters, stall_by_conn)))
+
+    async def publish_stall() -> None:
+        while True:
+            counters.set("stall_s", sum(w.summary()["stall_s"] for w in stall_by_conn.values()))
+            await asyncio.sleep(0.5)
+
+    tasks.append(asyncio.create_task(publish_stall()))
+    await asyncio.gather(*tasks)
+
+
+# ---- sources scenario ----
+
+
+async def run_sources_worker(index: int, count: int, args: argparse.Namespace, counters: WorkerCounters) -> None:
+    import pi_ws_two_messages as pi
+
+    pi_args = pi.parse_args(args.pi_args)
+    if not pi_args.sources_config:
+        raise SystemExit("sources scenario needs --sources-config after '--'")
+    sources = shard(pi.load_sources_config(pi_args.sources_config, pi_args.ws_url), index, count)
+    if not sources:
+        return
+    all_stats: list = []
+
+    async def publish() -> None:
+        while True:
+            await asyncio.sleep(0.5)
+            frames = sum(st.frames for st in all_stats)
+            counters.set("messages", 2 * frames)  # meta + binary per frame
+            counters.set("bytes", sum(st.bytes for st in all_stats))
+            counters.set("errors", sum(st.errors for st in all_stats))
+            counters.set("reconnects", sum(st.transport.stats.reconnects for st in all_stats if st.transport))
+            counters.set("stall_s", sum(st.window.summary()["stall_s"] for st in all_stats if st.window))
+
+    publisher = asyncio.create_task(publish())
+    try:
+        await pi.run_multi_source(pi_args, sources=sources, all_stats=all_stats)
+    finally:
+        publisher.cancel()
+
+
+# ---- worker / coordinator ----
+
+
+def worker_main(scenario: str, index: int, count: int, args: argparse.Namespace, shared, stop) -> None:
+    counters = WorkerCounters(shared, index)
+    runner = run_drones_worker if scenario == "drones" else run_sources_worker
+
+    async def main() -> None:
+        task = asyncio.create_task(runner(index, count, args, counters))
+        while not stop.is_set() and not task.done():
+            await asyncio.sleep(0.2)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+
+
+def format_rates(msgs_s: float, bytes_s: float, totals: dict) -> str:
+    return (
+        f"msgs/s={msgs_s:.0f} MB/s={bytes_s / 1e6:.2f} sent={totals['messages']:.0f} "
+        f"errors={totals['errors']:.0f} reconnects={totals['reconnects']:.0f} stall={totals['stall_s']:.1f}s"
+    )
+
+
+def coordinate(args: argparse.Namespace) -> int:
+    workers = max(1, args.workers)
+    shared = mp.Array("d", workers * NUM_FIELDS, lock=False)
+    stop = mp.Event()
+    procs = [
+        mp.Process(target=worker_main, args=(args.scenario, i, workers, args, shared, stop), daemon=True)
+        for i in range(workers)
+    ]
+    print(f"[loadgen] scenario={args.scenario} workers={workers}")
+    started = time.monotonic()
+    for p in procs:
+        p.start()
+
+    peak_msgs_s = 0.0
+    prev = read_totals(shared, workers)
+    prev_t = started
+    try:
+        while True:
+            time.sleep(args.report_interval)
+            now = time.monotonic()
+            totals = read_totals(shared, workers)
+            elapsed = max(1e-6, now - prev_t)
+            msgs_s = (totals["messages"] - prev["messages"]) / elapsed
+            bytes_s = (totals["bytes"] - prev["bytes"]) / elapsed
+            peak_msgs_s = max(peak_msgs_s, msgs_s)
+            print(f"[loadgen] t={now - started:.0f}s {format_rates(msgs_s, bytes_s, totals)}", flush=True)
+            prev, prev_t = totals, now
+            if args.duration and now - started >= args.duration:
+                break
+            if not any(p.is_alive() for p in procs):
+                print("[loadgen] all workers exited")
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        for p in procs:
+            p.join(timeout=5)
+            if p.is_alive():
+                p.terminate()
+
+    duration = time.monotonic() - started
+    totals = read_totals(shared, workers)
+    summary = {
+        "scenario": args.scenario,
+        "workers": workers,
+        "duration_s": round(duration, 3),
+        "totals": totals,
+        "avg_msgs_per_s": totals["messages"] / duration if duration > 0 else 0.0,
+        "avg_bytes_per_s": totals["bytes"] / duration if duration > 0 else 0.0,
+        "peak_msgs_per_s": peak_msgs_s,
+        "per_worker": [read_worker(shared, i) for i in range(workers)],
+        "params": vars(args),
+    }
+    with open(args.summary, "w", encoding="utf-8") as fh:
+        json.dump(summary, fh, indent=2)
+    print(
+        f"[loadgen] done in {duration:.1f}s: avg msgs/s={summary['avg_msgs_per_s']:.0f} "
+        f"peak msgs/s={peak_msgs_s:.0f}; summary written to {args.summary}"
+    )
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description="Multi-process load generator for the TESA WS hub")
+    p.add_argument("scenario", choices=["drones", "sources"], help="What each worker simulates")
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    p.add_argument("--duration", type=float, default=0.0, help="Stop after N seconds (0 = until Ctrl+C)")
+    p.add_argument("--report-interval", type=float, default=1.0, help="Seconds between live stats lines")
+    p.add_argument("--summary", default="loadgen-summary.json", help="Where to write the final JSON summary")
+    # drones scenario
+    p.add_argument("--url", default="ws://localhost:3000/ws?role=pi", help="Hub WS URL (drones scenario)")
+    p.add_argument("--drones", type=int, default=100, help="Total simulated drones (drones scenario)")
+    p.add_argument("--connections", type=int, default=10, help="Total WS connections (drones scenario)")
+    p.add_argument("--interval", type=float, default=1.0, help="Seconds between updates per drone (drones scenario)")
+    p.add_argument("--start-lat", type=float, default=13.7563, help="Fleet center latitude (drones scenario)")
+    p.add_argument("--start-lon", type=float, default=100.5016, help="Fleet center longitude (drones scenario)")
+    p.add_argument("--speed", type=float, default=8.0, help="Drone speed m/s (drones scenario)")
+    p.add_argument("--alt", type=float, default=50.0, help="Drone altitude m (drones scenario)")
+    p.add_argument("--battery-drain", type=float, default=0.02, help="Battery drain per second (drones scenario)")
+    return p
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    # Everything after "--" belongs to pi_ws_two_messages.py (sources scenario)
+    pi_args: List[str] = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, pi_args = argv[:split], argv[split + 1:]
+    args = build_parser().parse_args(argv)
+    args.pi_args = pi_args
+    return coordinate(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
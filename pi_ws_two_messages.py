@@ -3,22 +3,41 @@
 Stream JPEG frames over WebSocket using a two-message protocol:
 1) Frame metadata as JSON text.
 2) Raw JPEG bytes.
+
+With --sources-config, several cameras are streamed from one asyncio process
+(one connection per source, shared JPEG encode pool). With --sim --shared-world
+all sources observe one simulated fleet, each through its own virtual camera
+(optional "lat", "lon", "view_half_width_m" per source). Config file (JSON):
+{
+  "ws_url": "ws://127.0.0.1:3000/ws?role=pi",
+  "sources": [
+    {"id": "pi-cam-01", "image_dir": "./img/cam1", "fps": 10, "target_height": 620, "quality": 20},
+    {"id": "pi-cam-02", "image_dir": "./img/cam2", "fps": 5}
+  ]
+}
 """
 import argparse
+import asyncio
 import glob
 
 import json
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import List, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 import math
 import random
 import uuid
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 import cv2
-from websocket import ABNF, create_connection
+from websocket import ABNF, WebSocketTimeoutException, create_connection
+
+from flow_control import CreditWindow, wait_for_credit_async
+from profiling import PROFILER, add_profile_args, profile_session
+from sender_transport import Outgoing, SenderTransport, add_transport_args
 
 
 # Configuration defaults (override via CLI flags if desired)
@@ -28,6 +47,8 @@ FPS = 10
 IMAGE_DIR = "./img"
 TARGET_HEIGHT = 620
 JPEG_QUALITY = 20
+ACK_POLL_S = 0.5
+STATS_INTERVAL_S = 5.0
 
 
 def list_images(directory: str) -> List[str]:
@@ -47,7 +68,8 @@ def load_and_resize(path: str, target_h: int, quality: int) -> Tuple[bytes, int,
     Load an image, resize to target height while preserving aspect ratio,
     and encode as JPEG with the given quality.
     """
-    image = cv2.imread(path, cv2.IMREAD_COLOR)
+    with PROFILER.stage("imread"):
+        image = cv2.imread(path, cv2.IMREAD_COLOR)
     if image is None:
         raise ValueError(f"Failed to load image: {path}")
 
@@ -55,13 +77,15 @@ def load_and_resize(path: str, target_h: int, quality: int) -> Tuple[bytes, int,
     if h != target_h:
         scale = target_h / float(h)
         new_w = max(1, int(round(w * scale)))
-        image = cv2.resize(image, (new_w, target_h), interpolation=cv2.INTER_AREA)
+        with PROFILER.stage("resize"):
+            image = cv2.resize(image, (new_w, target_h), interpolation=cv2.INTER_AREA)
         w = new_w
         h = target_h
 
-    success, encoded = cv2.imencode(
-        ".jpg", image, [int(cv2.IMWRITE_JPEG_QUALITY), int(quality)]
-    )
+    with PROFILER.stage("imencode"):
+        success, encoded = cv2.imencode(
+            ".jpg", image, [int(cv2.IMWRITE_JPEG_QUALITY), int(quality)]
+        )
     if not success:
         raise RuntimeError(f"JPEG encoding failed for: {path}")
 
@@ -73,23 +97,52 @@ def utc_iso_now() -> str:
     return datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
 
 
-def send_frame(ws, frame_id: int, jpeg_bytes: bytes, width: int, height: int, objects: List[dict]) -> None:
-    """Send frame metadata followed by the binary JPEG payload."""
-    meta = {
+def wait_for_credit(ws, window: Optional[CreditWindow]) -> None:
+    """Block until the hub grants a send credit, consuming its acks meanwhile."""
+    if window is None:
+        return
+    while not window.try_acquire():
+        ws.settimeout(ACK_POLL_S)
+        try:
+            window.feed(ws.recv())
+        except WebSocketTimeoutException:
+            pass
+        finally:
+            ws.settimeout(None)
+
+
+def build_frame_meta(
+    frame_id: int,
+    source_id: str,
+    width: int,
+    height: int,
+    quality: int,
+    objects: List[dict],
+) -> dict:
+    """Build the frame_meta JSON that precedes each JPEG."""
+    return {
         "kind": "frame_meta",
         "frame_id": frame_id,
         "timestamp": utc_iso_now(),
-        "source_id": SOURCE_ID,
+        "source_id": source_id,
         "image_info": {
             "mime": "image/jpeg",
             "width": width,
             "height": height,
-            "quality": JPEG_QUALITY,
+            "quality": quality,
         },
         "objects": objects,
     }
-    ws.send(json.dumps(meta))
-    ws.send(jpeg_bytes, opcode=ABNF.OPCODE_BINARY)
+
+
+def send_parts(ws, parts: List, window: Optional[CreditWindow] = None) -> None:
+    """Send text parts as text frames and bytes as binary frames, one credit each."""
+    for part in parts:
+        wait_for_credit(ws, window)
+        if isinstance(part, bytes):
+            ws.send(part, opcode=ABNF.OPCODE_BINARY)
+        else:
+            ws.send(part)
 
 
 # ---- Drone simulation (merged from drone_mqtt_simulator.py, adapted for WS) ----
@@ -230,6 +283,71 @@ def init_frames_states(
     return states
 
 
+def advance_drone(st: DroneState, dt: float, center_lat: float, center_lon: float) -> Tuple[float, float, float, float]:
+    """Advance one drone by dt; returns its true (lat, lon, alt_m, speed_mps)."""
+    current_speed = st.speed_base_mps * random.uniform(0.9, 1.1)
+
+    if st.motion == "circle":
+        st.angle_rad = (st.angle_rad + (current_speed / st.radius_m) * dt) % (2 * math.pi)
+        lat, lon = position_on_circle(center_lat, center_lon, st.radius_m, st.angle_rad)
+    else:
+        delta_north_m = current_speed * dt * math.cos(st.bearing_rad)
+        delta_east_m = current_speed * dt * math.sin(st.bearing_rad)
+        st.lat = st.lat + (delta_north_m / METERS_PER_DEGREE_LAT)
+        st.lon = st.lon + (delta_east_m / meters_per_degree_lon(st.lat))
+        lat, lon = st.lat, st.lon
+
+    t = time.time()
+    wobble_phase = st.angle_rad if st.motion == "circle" else t
+    alt = st.base_alt_m + st.wobble_m * math.sin(wobble_phase)
+    return lat, lon, alt, current_speed
+
+
+def add_gps_noise(lat: float, lon: float, noise_level_m: float) -> Tuple[float, float]:
+    """Apply gaussian GPS jitter (standard deviation in meters)."""
+    if noise_level_m > 0.0:
+        noise_north_m = random.gauss(0.0, noise_level_m)
+        noise_east_m = random.gauss(0.0, noise_level_m)
+        lat += noise_north_m / METERS_PER_DEGREE_LAT
+        lon += noise_east_m / meters_per_degree_lon(lat)
+    return lat, lon
+
+
+def false_positive_object(
+    center_lat: float,
+    center_lon: float,
+    image_width: int,
+    image_height: int,
+    base_altitude_m: float,
+    now_iso: str,
+    view_half_width_m: float = 600.0,
+) -> dict:
+    """A random low-confidence detection somewhere in the view around center."""
+    dx = random.uniform(-view_half_width_m, view_half_width_m)
+    dy = random.uniform(-view_half_width_m, view_half_width_m)
+    lat_fp = center_lat + (dy / METERS_PER_DEGREE_LAT)
+    lon_fp = center_lon + (dx / meters_per_degree_lon(center_lat))
+    bbox_fp, conf_fp = compute_bbox_and_conf(
+        dx,
+        dy,
+        current_speed_mps=random.uniform(0.0, 2.0),
+        image_width=image_width,
+        image_height=image_height,
+        view_half_width_m=view_half_width_m,
+    )
+    return {
+        "drone_id": f"fp-{uuid.uuid4().hex[:6]}",
+        "type": "unknown",
+        "lat": round(lat_fp, 7),
+        "lon": round(lon_fp, 7),
+        "alt_m": round(base_altitude_m + random.uniform(-5.0, 5.0), 2),
+        "speed_mps": round(random.uniform(0.0, 2.0), 2),
+        "bbox": [bbox_fp[0], bbox_fp[1], bbox_fp[2], bbox_fp[3]],
+        "confidence": round(clamp(conf_fp, 0.30, 0.50), 2),
+        "timestamp": now_iso,
+    }
+
+
 def generate_objects_for_frame(
     states: List[DroneState],
     dt: float,
@@ -248,27 +366,8 @@ def generate_objects_for_frame(
     now_iso = utc_iso_now()
 
     for st in states:
-        current_speed = st.speed_base_mps * random.uniform(0.9, 1.1)
-
-        if st.motion == "circle":
-            st.angle_rad = (st.angle_rad + (current_speed / st.radius_m) * dt) % (2 * math.pi)
-            lat, lon = position_on_circle(center_lat, center_lon, st.radius_m, st.angle_rad)
-        else:
-            delta_north_m = current_speed * dt * math.cos(st.bearing_rad)
-            delta_east_m = current_speed * dt * math.sin(st.bearing_rad)
-            st.lat = st.lat + (delta_north_m / METERS_PER_DEGREE_LAT)
-            st.lon = st.lon + (delta_east_m / meters_per_degree_lon(st.lat))
-            lat, lon = st.lat, st.lon
-
-        if noise_level_m > 0.0:
-            noise_north_m = random.gauss(0.0, noise_level_m)
-            noise_east_m = random.gauss(0.0, noise_level_m)
-            lat += noise_north_m / METERS_PER_DEGREE_LAT
-            lon += noise_east_m / meters_per_degree_lon(lat)
-
-        t = time.time()
-        wobble_phase = st.angle_rad if st.motion == "circle" else t
-        alt = st.base_alt_m + st.wobble_m * math.sin(wobble_phase)
+        lat, lon, alt, current_speed = advance_drone(st, dt, center_lat, center_lon)
+        lat, lon = add_gps_noise(lat, lon, noise_level_m)
 
         dx_east_m, dy_north_m = latlon_to_m_offsets(lat, lon, center_lat, center_lon)
         bbox, confidence = compute_bbox_and_conf(dx_east_m, dy_north_m, current_speed, image_width, image_height)
@@ -291,29 +390,452 @@ def generate_objects_for_frame(
             )
 
     if random.random() < false_positive_rate:
-        dx = random.uniform(-600.0, 600.0)
-        dy = random.uniform(-600.0, 600.0)
-        lat_fp = center_lat + (dy / METERS_PER_DEGREE_LAT)
-        lon_fp = center_lon + (dx / meters_per_degree_lon(center_lat))
-        bbox_fp, conf_fp = compute_bbox_and_conf(dx, dy, current_speed_mps=random.uniform(0.0, 2.0), image_width=image_width, image_height=image_height)
+        objects.append(false_positive_object(center_lat, center_lon, image_width, image_height, base_altitude_m, now_iso))
+
+    return objects
+
+
+# ---- Shared world: one fleet observed by several virtual cameras ----
+
+
+@dataclass
+class VirtualCamera:
+    camera_id: str
+    lat: float
+    lon: float
+    view_half_width_m: float = 600.0  # ground half-width covered by the image
+
+
+@dataclass
+class DroneSnapshot:
+    state: DroneState
+    lat: float
+    lon: float
+    alt_m: float
+    speed_mps: float
+
+
+class SimWorld:
+    """
+    One drone fleet shared by every camera. Drones are advanced once per world
+    step and bucketed into a uniform grid of cell_size_m cells, so a camera only
+    scans the cells its view overlaps instead of the whole fleet.
+    """
+
+    def __init__(
+        self,
+        states: List[DroneState],
+        center_lat: float,
+        center_lon: float,
+        cell_size_m: float = 250.0,
+        min_step_s: float = 0.05,
+    ):
+        self.states = states
+        self.center_lat = center_lat
+        self.center_lon = center_lon
+        self.cell_size_m = max(1.0, cell_size_m)
+        self.min_step_s = min_step_s
+        self.last_t: Optional[float] = None
+        self.grid: Dict[Tuple[int, int], List[DroneSnapshot]] = {}
+
+    def _cell(self, dx_east_m: float, dy_north_m: float) -> Tuple[int, int]:
+        return math.floor(dx_east_m / self.cell_size_m), math.floor(dy_north_m / self.cell_size_m)
+
+    def advance_to(self, now: float) -> None:
+        """Step the fleet to monotonic time now (cameras share steps closer than min_step_s)."""
+        if self.last_t is not None and now - self.last_t < self.min_step_s:
+            return
+        dt = 0.0 if self.last_t is None else now - self.last_t
+        self.last_t = now
+        grid: Dict[Tuple[int, int], List[DroneSnapshot]] = {}
+        for st in self.states:
+            lat, lon, alt, speed = advance_drone(st, dt, self.center_lat, self.center_lon)
+            dx, dy = latlon_to_m_offsets(lat, lon, self.center_lat, self.center_lon)
+            grid.setdefault(self._cell(dx, dy), []).append(DroneSnapshot(st, lat, lon, alt, speed))
+        self.grid = grid
+
+    def visible(self, camera: VirtualCamera) -> List[DroneSnapshot]:
+        """Drones inside the camera's square ground view."""
+        cx, cy = latlon_to_m_offsets(camera.lat, camera.lon, self.center_lat, self.center_lon)
+        hw = camera.view_half_width_m
+        x0, y0 = self._cell(cx - hw, cy - hw)
+        x1, y1 = self._cell(cx + hw, cy + hw)
+        found: List[DroneSnapshot] = []
+        for ix in range(x0, x1 + 1):
+            for iy in range(y0, y1 + 1):
+                for snap in self.grid.get((ix, iy), ()):
+                    dx, dy = latlon_to_m_offsets(snap.lat, snap.lon, camera.lat, camera.lon)
+                    if abs(dx) <= hw and abs(dy) <= hw:
+                        found.append(snap)
+        return found
+
+
+def observe_world(
+    world: SimWorld,
+    camera: VirtualCamera,
+    image_width: int,
+    image_height: int,
+    noise_level_m: float,
+    miss_rate: float,
+    false_positive_rate: float,
+    base_altitude_m: float,
+) -> List[dict]:
+    """Object list for one camera frame: visible drones projected into its image."""
+    objects: List[dict] = []
+    now_iso = utc_iso_now()
+
+    for snap in world.visible(camera):
+        if random.random() < miss_rate:
+            continue
+        lat, lon = add_gps_noise(snap.lat, snap.lon, noise_level_m)
+        dx_east_m, dy_north_m = latlon_to_m_offsets(lat, lon, camera.lat, camera.lon)
+        bbox, confidence = compute_bbox_and_conf(
+            dx_east_m,
+            dy_north_m,
+            snap.speed_mps,
+            image_width,
+            image_height,
+            view_half_width_m=camera.view_half_width_m,
+        )
         objects.append(
             {
-                "drone_id": f"fp-{uuid.uuid4().hex[:6]}",
-                "type": "unknown",
-                "lat": round(lat_fp, 7),
-                "lon": round(lon_fp, 7),
-                "alt_m": round(base_altitude_m + random.uniform(-5.0, 5.0), 2),
-                "speed_mps": round(random.uniform(0.0, 2.0), 2),
-                "bbox": [bbox_fp[0], bbox_fp[1], bbox_fp[2], bbox_fp[3]],
-                "confidence": round(clamp(conf_fp, 0.30, 0.50), 2),
+                "drone_id": snap.state.drone_id,
+                "type": snap.state.type,
+                "lat": round(lat, 7),
+                "lon": round(lon, 7),
+                "alt_m": round(snap.alt_m, 2),
+                "speed_mps": round(snap.speed_mps, 2),
+                "bbox": [bbox[0], bbox[1], bbox[2], bbox[3]],
+                "confidence": confidence,
                 "timestamp": now_iso,
             }
         )
 
+    if random.random() < false_positive_rate:
+        objects.append(
+            false_positive_object(
+                camera.lat,
+                camera.lon,
+                image_width,
+                image_height,
+                base_altitude_m,
+                now_iso,
+                view_half_width_m=camera.view_half_width_m,
+            )
+        )
+
     return objects
 
 
-def parse_args() -> argparse.Namespace:
+# ---- Multi-source mode (one asyncio process, several cameras) ----
+
+
+@dataclass
+class SourceConfig:
+    source_id: str
+    image_dir: str
+    ws_url: str
+    fps: float = FPS
+    target_height: int = TARGET_HEIGHT
+    quality: int = JPEG_QUALITY
+    # Virtual camera placement for --shared-world (defaults to the sim center)
+    camera_lat: Optional[float] = None
+    camera_lon: Optional[float] = None
+    view_half_width_m: float = 600.0
+
+
+@dataclass
+class SourceStats:
+    source_id: str
+    frames: int = 0
+    bytes: int = 0
+    errors: int = 0
+    encode_s: float = 0.0
+    started: float = field(default_factory=time.monotonic)
+    window: Optional[CreditWindow] = None
+    transport: Optional[SenderTransport] = None
+
+    def format(self) -> str:
+        elapsed = max(1e-6, time.monotonic() - self.started)
+        encode_ms = 1000.0 * self.encode_s / self.frames if self.frames else 0.0
+        stall_s = self.window.summary()["stall_s"] if self.window else 0.0
+        line = (
+            f"{self.source_id}: frames={self.frames} fps={self.frames / elapsed:.1f} "
+            f"kB/s={self.bytes / elapsed / 1024:.0f} encode={encode_ms:.1f}ms "
+            f"stall={stall_s:.2f}s errors={self.errors}"
+        )
+        if self.transport is not None:
+            line += f" {self.transport.format_stats()}"
+        return line
+
+
+def with_source_id(ws_url: str, source_id: str) -> str:
+    """Return ws_url with its source_id query parameter set to source_id."""
+    parts = urlsplit(ws_url)
+    query = [(k, v) for k, v in parse_qsl(parts.query) if k != "source_id"]
+    query.append(("source_id", source_id))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def load_sources_config(path: str, default_ws_url: str) -> List[SourceConfig]:
+    """Read the --sources-config JSON file into SourceConfig entries."""
+    with open(path, "r", encoding="utf-8") as fh:
+        data = json.load(fh)
+    base_url = data.get("ws_url", default_ws_url)
+    sources: List[SourceConfig] = []
+    for entry in data.get("sources", []):
+        source_id = entry["id"]
+        sources.append(
+            SourceConfig(
+                source_id=source_id,
+                image_dir=entry["image_dir"],
+                ws_url=entry.get("ws_url") or with_source_id(base_url, source_id),
+                fps=float(entry.get("fps", FPS)),
+                target_height=int(entry.get("target_height", TARGET_HEIGHT)),
+                quality=int(entry.get("quality", JPEG_QUALITY)),
+                camera_lat=entry.get("lat"),
+                camera_lon=entry.get("lon"),
+                view_half_width_m=float(entry.get("view_half_width_m", 600.0)),
+            )
+        )
+    if not sources:
+        raise ValueError(f"No sources listed in {path}")
+    return sources
+
+
+def timed_load_and_resize(path: str, target_h: int, quality: int) -> Tuple[Tuple[bytes, int, int], float]:
+    """load_and_resize plus its wall time, measured on the worker thread."""
+    t0 = time.perf_counter()
+    result = load_and_resize(path, target_h, quality)
+    return result, time.perf_counter() - t0
+
+
+# (width, height, dt) -> objects for one frame
+ObjectsFn = Callable[[int, int, float], List[dict]]
+
+
+async def stream_source(
+    cfg: SourceConfig,
+    pool: ThreadPoolExecutor,
+    stats: SourceStats,
+    objects_fn: Optional[ObjectsFn] = None,
+    verbose: bool = False,
+    transport: Optional[SenderTransport] = None,
+) -> None:
+    """Stream one source over its own connection, encoding on the shared pool.
+
+    Frames keep being produced while the hub is unreachable; they wait in the
+    transport's resend buffer and are replayed in order after a reconnect.
+    """
+    import websockets  # type: ignore
+
+    images = list_images(cfg.image_dir)
+    if not images:
+        raise FileNotFoundError(f"No supported images found in {cfg.image_dir}")
+
+    loop = asyncio.get_running_loop()
+    period = 1.0 / cfg.fps if cfg.fps > 0 else 0.0
+    transport = transport or SenderTransport()
+    stats.transport = transport
+    ws = None
+    window: Optional[CreditWindow] = None
+
+    def encode(index: int):
+        path = images[index % len(images)]
+        return loop.run_in_executor(pool, timed_load_and_resize, path, cfg.target_height, cfg.quality)
+
+    async def send(item: Outgoing) -> None:
+        with PROFILER.stage("send"):
+            for part in item.parts:
+                await wait_for_credit_async(ws, window)
+                await ws.send(part)
+        stats.frames += 1
+        stats.bytes += len(item.parts[-1])
+
+    frame_id = 0
+    next_due = loop.time()
+    pending = encode(0)
+    try:
+        while True:
+            (jpeg_bytes, width, height), encode_s = await pending
+            stats.encode_s += encode_s
+            # Encode the next frame while this one is paced and sent
+            pending = encode(frame_id + 1)
+
+            with PROFILER.stage("generate_objects"):
+                objects = objects_fn(width, height, period) if objects_fn else []
+            meta = build_frame_meta(frame_id, cfg.source_id, width, height, cfg.quality, objects)
+            with PROFILER.stage("json.dumps"):
+                text = json.dumps(meta)
+            transport.put("frame", [text, jpeg_bytes])
+            frame_id += 1
+
+            if ws is None and transport.connect_due():
+                try:
+                    ws = await websockets.connect(cfg.ws_url, max_size=None)  # type: ignore
+                    window = CreditWindow()
+                    stats.window = window
+                    transport.on_connected()
+                    if verbose:
+                        print(f"[pi] {cfg.source_id}: connected to {cfg.ws_url}")
+                except Exception as e:
+                    stats.errors += 1
+                    delay = transport.on_disconnected()
+                    print(f"[pi] {cfg.source_id}: connect failed: {e}; retry in {delay:.1f}s")
+            if ws is not None:
+                try:
+                    await transport.flush_async(send)
+                except Exception as e:
+                    stats.errors += 1
+                    delay = transport.on_disconnected()
+                    print(f"[pi] {cfg.source_id}: connection lost: {e}; reconnect in {delay:.1f}s")
+                    try:
+                        await ws.close()
+                    except Exception:
+                        pass
+                    ws = None
+
+            if period > 0:
+                next_due += period
+                delay = next_due - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                else:
+                    # Behind schedule: don't burst to catch up
+                    next_due = loop.time()
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        stats.errors += 1
+        print(f"[pi] {cfg.source_id}: stopped: {e}")
+    finally:
+        if ws is not None:
+            await ws.close()
+
+
+async def report_stats(all_stats: List[SourceStats], interval_s: float) -> None:
+    while True:
+        await asyncio.sleep(interval_s)
+        for stats in all_stats:
+            print(f"[pi] {stats.format()}", flush=True)
+
+
+def make_private_sim(args: argparse.Namespace, source_id: str) -> ObjectsFn:
+    """Per-source drone simulation (each source sees its own drones)."""
+    speed_min, speed_max = args.speed_range_mps
+    states = init_frames_states(
+        num_drones=args.num_drones,
+        center_lat=args.center_lat,
+        center_lon=args.center_lon,
+        radius_m=args.radius_m,
+        altitude_m=args.altitude_m,
+        altitude_wobble_m=args.altitude_wobble_m,
+        speed_min=speed_min,
+        speed_max=speed_max,
+    )
+
+    def objects_fn(width: int, height: int, dt: float) -> List[dict]:
+        return generate_objects_for_frame(
+            states=states,
+            dt=dt,
+            center_lat=args.center_lat,
+            center_lon=args.center_lon,
+            image_width=width,
+            image_height=height,
+            noise_level_m=args.noise_level_m,
+            miss_rate=args.miss_rate,
+            false_positive_rate=args.false_positive_rate,
+            base_altitude_m=args.altitude_m,
+            source_id=source_id,
+        )
+
+    return objects_fn
+
+
+def make_shared_world(args: argparse.Namespace) -> SimWorld:
+    speed_min, speed_max = args.speed_range_mps
+    states = init_frames_states(
+        num_drones=args.num_drones,
+        center_lat=args.center_lat,
+        center_lon=args.center_lon,
+        radius_m=args.radius_m,
+        altitude_m=args.altitude_m,
+        altitude_wobble_m=args.altitude_wobble_m,
+        speed_min=speed_min,
+        speed_max=speed_max,
+    )
+    return SimWorld(states, args.center_lat, args.center_lon, cell_size_m=args.grid_cell_m)
+
+
+def make_camera_sim(args: argparse.Namespace, world: SimWorld, cfg: SourceConfig) -> ObjectsFn:
+    """Objects for one source as seen by its virtual camera in the shared world."""
+    camera = VirtualCamera(
+        camera_id=cfg.source_id,
+        lat=cfg.camera_lat if cfg.camera_lat is not None else args.center_lat,
+        lon=cfg.camera_lon if cfg.camera_lon is not None else args.center_lon,
+        view_half_width_m=cfg.view_half_width_m,
+    )
+
+    def objects_fn(width: int, height: int, dt: float) -> List[dict]:
+        world.advance_to(time.monotonic())
+        return observe_world(
+            world,
+            camera,
+            image_width=width,
+            image_height=height,
+            noise_level_m=args.noise_level_m,
+            miss_rate=args.miss_rate,
+            false_positive_rate=args.false_positive_rate,
+            base_altitude_m=args.altitude_m,
+        )
+
+    return objects_fn
+
+
+async def run_multi_source(
+    args: argparse.Namespace,
+    sources: Optional[List[SourceConfig]] = None,
+    all_stats: Optional[List[SourceStats]] = None,
+) -> None:
+    """Stream every source (or the given subset) until cancelled; fills all_stats."""
+    if sources is None:
+        sources = load_sources_config(args.sources_config, args.ws_url)
+    if all_stats is None:
+        all_stats = []
+    all_stats[:] = [SourceStats(source_id=cfg.source_id) for cfg in sources]
+    print(f"[pi] Multi-source: {len(sources)} sources, encode workers={args.encode_workers}")
+
+    world = make_shared_world(args) if args.sim and args.shared_world else None
+
+    def objects_fn_for(cfg: SourceConfig) -> Optional[ObjectsFn]:
+        if not args.sim:
+            return None
+        if world is not None:
+            return make_camera_sim(args, world, cfg)
+        return make_private_sim(args, cfg.source_id)
+
+    with ThreadPoolExecutor(max_workers=args.encode_workers, thread_name_prefix="encode") as pool:
+        tasks = [
+            stream_source(
+                cfg,
+                pool,
+                stats,
+                objects_fn=objects_fn_for(cfg),
+                verbose=args.verbose,
+                transport=SenderTransport.from_args(args),
+            )
+            for cfg, stats in zip(sources, all_stats)
+        ]
+        reporter = asyncio.create_task(report_stats(all_stats, args.stats_interval))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            reporter.cancel()
+            for stats in all_stats:
+                print(f"[pi] final {stats.format()}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Stream local images over WebSocket, with optional drone simulation metadata.")
     parser.add_argument("--ws-url", default=WS_URL, help="WebSocket endpoint URL.")
     parser.add_argument("--source-id", default=SOURCE_ID, help="Camera/source identifier.")
@@ -331,15 +853,20 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--noise-level-m", type=float, default=3.0, help="GPS jitter standard deviation in meters (sim).")
     parser.add_argument("--miss-rate", type=float, default=0.10, help="Probability per frame to miss a real drone (sim).")
     parser.add_argument("--false-positive-rate", type=float, default=0.03, help="Probability per frame to add a false detection (sim).")
+    # Multi-source mode
+    parser.add_argument("--sources-config", default=None, help="JSON file listing several sources to stream from this process.")
+    parser.add_argument("--encode-workers", type=int, default=min(4, os.cpu_count() or 1), help="Threads shared by all sources for JPEG encoding (multi-source).")
+    parser.add_argument("--shared-world", action="store_true", help="With --sim: one fleet seen by every source's virtual camera (lat/lon/view_half_width_m per source).")
+    parser.add_argument("--grid-cell-m", type=float, default=250.0, help="Spatial index cell size in meters for --shared-world.")
+    parser.add_argument("--stats-interval", type=float, default=STATS_INTERVAL_S, help="Seconds between per-source stats lines (multi-source).")
     parser.add_argument("--verbose", action="store_true", help="Print debug logs while streaming.")
-    return parser.parse_args()
+    add_transport_args(parser)
+    add_profile_args(parser)
+    return parser.parse_args(argv)
 
 
-def main() -> None:
-    args = parse_args()
-    global SOURCE_ID
-    SOURCE_ID = args.source_id
-
+def run_single_source(args: argparse.Namespace) -> None:
+    """Stream --image-dir over one blocking connection."""
     images = list_images(args.image_dir)
     if not images:
         raise FileNotFoundError(f"No supported images found in {args.image_dir}")
@@ -363,43 +890,90 @@ def main() -> None:
         )
 
     if args.verbose:
-        print(f"[pi] Connecting to {args.ws_url} as source_id={SOURCE_ID}")
+        print(f"[pi] Connecting to {args.ws_url} as source_id={args.source_id}")
         print(f"[pi] Found {len(images)} images in {args.image_dir}, fps={args.fps}, delay={delay:.3f}s")
         print(f"[pi] Simulation: {'ON' if args.sim else 'OFF'}")
-    ws = create_connection(args.ws_url)
-    if args.verbose:
-        print("[pi] Connected")
+    transport = SenderTransport.from_args(args)
+    ws = None
+    window = CreditWindow()
+
+    def send(item: Outgoing) -> None:
+        with PROFILER.stage("send"):
+            send_parts(ws, item.parts, window)
+
     try:
         while True:
             for path in images:
                 jpeg_bytes, width, height = load_and_resize(path, TARGET_HEIGHT, JPEG_QUALITY)
                 objects: List[dict] = []
                 if args.sim:
-                    objects = generate_objects_for_frame(
-                        states=sim_states,
-                        dt=delay if delay > 0 else 0.0,
-                        center_lat=args.center_lat,
-                        center_lon=args.center_lon,
-                        image_width=width,
-                        image_height=height,
-                        noise_level_m=args.noise_level_m,
-                        miss_rate=args.miss_rate,
-                        false_positive_rate=args.false_positive_rate,
-                        base_altitude_m=args.altitude_m,
-                        source_id=SOURCE_ID,
-                    )
-                if args.verbose:
-                    print(f"[pi] frame {frame_id}: sending meta (objects={len(objects)}) width={width} height={height}")
-                send_frame(ws, frame_id, jpeg_bytes, width, height, objects)
-                if args.verbose:
-                    print(f"[pi] frame {frame_id}: sent binary ({len(jpeg_bytes)} bytes)")
+                    with PROFILER.stage("generate_objects"):
+                        objects = generate_objects_for_frame(
+                            states=sim_states,
+                            dt=delay if delay > 0 else 0.0,
+                            center_lat=args.center_lat,
+                            center_lon=args.center_lon,
+                            image_width=width,
+                            image_height=height,
+                            noise_level_m=args.noise_level_m,
+                            miss_rate=args.miss_rate,
+                            false_positive_rate=args.false_positive_rate,
+                            base_altitude_m=args.altitude_m,
+                            source_id=args.source_id,
+                        )
+                meta = build_frame_meta(frame_id, args.source_id, width, height, JPEG_QUALITY, objects)
+                with PROFILER.stage("json.dumps"):
+                    text = json.dumps(meta)
+                # Queued first so frames taken while disconnected are replayed after reconnect
+                transport.put("frame", [text, jpeg_bytes])
+
+                if ws is None and transport.connect_due():
+                    try:
+                        ws = create_connection(args.ws_url)
+                        window = CreditWindow()
+                        transport.on_connected()
+                        if args.verbose:
+                            print("[pi] Connected")
+                    except Exception as e:
+                        retry = transport.on_disconnected()
+                        print(f"[pi] connect failed: {e}; retry in {retry:.1f}s")
+                if ws is not None:
+                    if args.verbose:
+                        print(f"[pi] frame {frame_id}: queued meta (objects={len(objects)}) width={width} height={height}")
+                    try:
+                        transport.flush(send)
+                    except Exception as e:
+                        retry = transport.on_disconnected()
+                        print(f"[pi] connection lost: {e}; reconnect in {retry:.1f}s ({transport.format_stats()})")
+                        try:
+                            ws.close()
+                        except Exception:
+                            pass
+                        ws = None
+                    if args.verbose and ws is not None:
+                        print(f"[pi] frame {frame_id}: sent binary ({len(jpeg_bytes)} bytes) {window.format_stats()}")
                 frame_id += 1
                 if delay > 0:
                     time.sleep(delay)
     except KeyboardInterrupt:
         pass
     finally:
-        ws.close()
+        print(f"[pi] flow control: {window.format_stats()}")
+        print(f"[pi] transport: {transport.format_stats()}")
+        if ws is not None:
+            ws.close()
+
+
+def main() -> None:
+    args = parse_args()
+    with profile_session(args, "pi"):
+        if args.sources_config:
+            try:
+                asyncio.run(run_multi_source(args))
+            except KeyboardInterrupt:
+                pass
+        else:
+            run_single_source(args)
 
 
 if __name__ == "__main__":
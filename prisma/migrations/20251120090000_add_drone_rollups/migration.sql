@@ -0,0 +1,59 @@
+-- CreateEnum
+CREATE TYPE "public"."RollupSource" AS ENUM ('READING', 'DETECTION');
+
+-- CreateTable
+CREATE TABLE "public"."DroneRollup" (
+    "droneId" TEXT NOT NULL,
+    "source" "public"."RollupSource" NOT NULL,
+    "bucketSec" INTEGER NOT NULL,
+    "bucketStart" TIMESTAMP(3) NOT NULL,
+    "count" INTEGER NOT NULL,
+    "firstTs" TIMESTAMP(3) NOT NULL,
+    "firstLat" DOUBLE PRECISION NOT NULL,
+    "firstLon" DOUBLE PRECISION NOT NULL,
+    "lastTs" TIMESTAMP(3) NOT NULL,
+    "lastLat" DOUBLE PRECISION NOT NULL,
+    "lastLon" DOUBLE PRECISION NOT NULL,
+    "lastAltM" DOUBLE PRECISION,
+    "sumLat" DOUBLE PRECISION NOT NULL,
+    "sumLon" DOUBLE PRECISION NOT NULL,
+    "sumAltM" DOUBLE PRECISION NOT NULL DEFAULT 0,
+    "altCount" INTEGER NOT NULL DEFAULT 0,
+    "maxSpeedMS" DOUBLE PRECISION,
+    "minBatteryPct" DOUBLE PRECISION,
+    "updatedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "DroneRollup_pkey" PRIMARY KEY ("droneId","source","bucketSec","bucketStart")
+);
+
+-- CreateIndex
+CREATE INDEX "DroneRollup_source_bucketSec_bucketStart_idx" ON "public"."DroneRollup"("source", "bucketSec", "bucketStart");
+
+-- Backfill: bucket the existing readings and detections (same aggregation as rebuildRollups)
+INSERT INTO "public"."DroneRollup" (
+    "droneId", "source", "bucketSec", "bucketStart", "count",
+    "firstTs", "firstLat", "firstLon", "lastTs", "lastLat", "lastLon", "lastAltM",
+    "sumLat", "sumLon", "sumAltM", "altCount",
+    "maxSpeedMS", "minBatteryPct", "updatedAt"
+)
+SELECT b."droneId", b."source"::"public"."RollupSource", b."bucketSec", b."bucket", COUNT(*)::int,
+    MIN(b."ts"),
+    (ARRAY_AGG(b."lat" ORDER BY b."ts" ASC))[1], (ARRAY_AGG(b."lon" ORDER BY b."ts" ASC))[1],
+    MAX(b."ts"),
+    (ARRAY_AGG(b."lat" ORDER BY b."ts" DESC))[1], (ARRAY_AGG(b."lon" ORDER BY b."ts" DESC))[1],
+    (ARRAY_AGG(b."alt" ORDER BY b."ts" DESC))[1],
+    SUM(b."lat"), SUM(b."lon"), COALESCE(SUM(b."alt"), 0), COUNT(b."alt")::int,
+    MAX(b."speed"), MIN(b."battery"), CURRENT_TIMESTAMP
+FROM (
+    SELECT s.*, k."bucketSec",
+        TO_TIMESTAMP(FLOOR(EXTRACT(EPOCH FROM s."ts") / k."bucketSec") * k."bucketSec") AT TIME ZONE 'UTC' AS "bucket"
+    FROM (
+        SELECT 'READING' AS "source", "droneId", "ts", "lat", "lon", "altM" AS "alt", "speedMS" AS "speed", "batteryPct" AS "battery"
+        FROM "public"."DroneReading"
+        UNION ALL
+        SELECT 'DETECTION', "droneId", "deviceTs", "latDeg", "lonDeg", "altM", "speedMps", NULL::double precision
+        FROM "public"."DroneDetection"
+    ) s
+    CROSS JOIN (VALUES (1), (60), (3600)) AS k("bucketSec")
+) b
+GROUP BY b."droneId", b."source", b."bucketSec", b."bucket";
@@ -0,0 +1,33 @@
+-- CreateEnum
+CREATE TYPE "public"."ReprocessStatus" AS ENUM ('PENDING', 'RUNNING', 'PAUSED', 'DONE', 'FAILED');
+
+-- CreateTable
+CREATE TABLE "public"."ReprocessJob" (
+    "id" BIGSERIAL NOT NULL,
+    "status" "public"."ReprocessStatus" NOT NULL DEFAULT 'PENDING',
+    "topic" TEXT,
+    "receivedFrom" TIMESTAMP(3),
+    "receivedTo" TIMESTAMP(3),
+    "parseOk" BOOLEAN NOT NULL DEFAULT false,
+    "errorPattern" TEXT,
+    "batchSize" INTEGER NOT NULL DEFAULT 500,
+    "concurrency" INTEGER NOT NULL DEFAULT 4,
+    "total" INTEGER NOT NULL DEFAULT 0,
+    "cursorId" BIGINT NOT NULL DEFAULT 0,
+    "scanned" INTEGER NOT NULL DEFAULT 0,
+    "succeeded" INTEGER NOT NULL DEFAULT 0,
+    "failed" INTEGER NOT NULL DEFAULT 0,
+    "frames" INTEGER NOT NULL DEFAULT 0,
+    "detections" INTEGER NOT NULL DEFAULT 0,
+    "activeMs" INTEGER NOT NULL DEFAULT 0,
+    "lastError" TEXT,
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "startedAt" TIMESTAMP(3),
+    "finishedAt" TIMESTAMP(3),
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "ReprocessJob_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateIndex
+CREATE INDEX "ReprocessJob_status_idx" ON "public"."ReprocessJob"("status");
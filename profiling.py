@@ -0,0 +1,183 @@
+"""
+Per-stage timing for the senders (--profile).
+
+Code marks its stages with ``with PROFILER.stage("imencode"): ...``. While
+profiling is enabled each stage's wall time is measured with
+time.perf_counter() and kept in a fixed-size rolling window, so the printed
+percentiles follow recent behaviour. While it is disabled, stage() returns a
+shared no-op context manager and nothing is recorded.
+
+profile_session() turns this on from the CLI flags: it prints a report every
+--profile-interval seconds from a background thread, writes a JSON summary on
+exit and can also run the whole session under cProfile.
+"""
+from __future__ import annotations
+
+import argparse
+import cProfile
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, List, Optional
+
+DEFAULT_WINDOW = 2048
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("profiler", "name", "t0")
+
+    def __init__(self, profiler: "StageProfiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.t0 = time.perf_counter()
+
+    def __exit__(self, *exc) -> bool:
+        self.profiler.record(self.name, time.perf_counter() - self.t0)
+        return False
+
+
+class StageStats:
+    __slots__ = ("count", "total_s", "max_s", "window")
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+        self.window: Deque[float] = deque(maxlen=window)
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list (q in 0..100)."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class StageProfiler:
+    """Rolling per-stage timings; thread-safe, so encode workers can record too."""
+
+    def __init__(self, enabled: bool = False, window: int = DEFAULT_WINDOW):
+        self.enabled = enabled
+        self.window = window
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._stages: Dict[str, StageStats] = {}
+
+    def enable(self, window: int = DEFAULT_WINDOW) -> None:
+        with self._lock:
+            self.window = window
+            self._stages.clear()
+            self.started = time.monotonic()
+            self.enabled = True
+
+    def stage(self, name: str):
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def record(self, name: str, seconds: float) -> None:
+        with self._lock:
+            st = self._stages.get(name)
+            if st is None:
+                st = self._stages[name] = StageStats(self.window)
+            st.count += 1
+            st.total_s += seconds
+            if seconds > st.max_s:
+                st.max_s = seconds
+            st.window.append(seconds)
+
+    def summary(self) -> dict:
+        """Totals since enable() plus percentiles over each stage's rolling window."""
+        with self._lock:
+            elapsed = max(1e-9, time.monotonic() - self.started)
+            stages = {}
+            for name, st in self._stages.items():
+                recent = sorted(st.window)
+                stages[name] = {
+                    "count": st.count,
+                    "total_s": round(st.total_s, 6),
+                    "share": round(st.total_s / elapsed, 4),
+                    "mean_ms": round(1000.0 * st.total_s / st.count, 4) if st.count else 0.0,
+                    "p50_ms": round(1000.0 * percentile(recent, 50), 4),
+                    "p95_ms": round(1000.0 * percentile(recent, 95), 4),
+                    "p99_ms": round(1000.0 * percentile(recent, 99), 4),
+                    "max_ms": round(1000.0 * st.max_s, 4),
+                }
+            return {"elapsed_s": round(elapsed, 3), "window": self.window, "stages": stages}
+
+    def format_report(self, tag: str) -> str:
+        s = self.summary()
+        if not s["stages"]:
+            return f"[{tag}] profile: no samples yet"
+        lines = [f"[{tag}] profile after {s['elapsed_s']:.0f}s (percentiles over last {s['window']} samples):"]
+        for name, st in sorted(s["stages"].items(), key=lambda kv: -kv[1]["total_s"]):
+            lines.append(
+                f"[{tag}]   {name:<16} n={st['count']:<7} p50={st['p50_ms']:.2f}ms p95={st['p95_ms']:.2f}ms "
+                f"p99={st['p99_ms']:.2f}ms max={st['max_ms']:.2f}ms share={100.0 * st['share']:.1f}%"
+            )
+        return "\n".join(lines)
+
+
+# Process-wide profiler used by the senders' stage markers
+PROFILER = StageProfiler()
+
+
+def add_profile_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--profile", action="store_true", help="Time each send stage and print rolling percentiles.")
+    parser.add_argument("--profile-interval", type=float, default=5.0, help="Seconds between --profile reports.")
+    parser.add_argument("--profile-summary", default="profile-summary.json", help="Where --profile writes its JSON summary on exit.")
+    parser.add_argument("--profile-cprofile", default=None, help="Also run under cProfile and write pstats data to this file (main thread only).")
+
+
+@contextmanager
+def profile_session(args: argparse.Namespace, tag: str) -> Iterator[None]:
+    """Apply the --profile flags for the duration of the block."""
+    if not args.profile and not args.profile_cprofile:
+        yield
+        return
+
+    stop = threading.Event()
+    if args.profile:
+        PROFILER.enable()
+
+        def report() -> None:
+            while not stop.wait(args.profile_interval):
+                print(PROFILER.format_report(tag), flush=True)
+
+        threading.Thread(target=report, name="profile-report", daemon=True).start()
+
+    cprof: Optional[cProfile.Profile] = None
+    if args.profile_cprofile:
+        cprof = cProfile.Profile()
+        cprof.enable()
+    try:
+        yield
+    finally:
+        stop.set()
+        if cprof is not None:
+            cprof.disable()
+            cprof.dump_stats(args.profile_cprofile)
+            print(f"[{tag}] cProfile data written to {args.profile_cprofile} (python -m pstats {args.profile_cprofile})")
+        if args.profile:
+            print(PROFILER.format_report(tag))
+            with open(args.profile_summary, "w", encoding="utf-8") as fh:
+                json.dump({"tool": tag, **PROFILER.summary()}, fh, indent=2)
+            print(f"[{tag}] profile summary written to {args.profile_summary}")
@@ -0,0 +1,332 @@
+"""
+Reconnect and resend handling shared by the senders (sentbackend.py,
+pi_ws_two_messages.py).
+
+Every outgoing message goes through a ResendBuffer first. While the hub is
+unreachable the messages stay there, bounded by age and total bytes, and a
+per-kind policy decides what is worth keeping:
+
+  latest  keep only the newest message per key (drone_state per droneId);
+          only entries queued while disconnected are merged, so live
+          updates are never dropped while the sender waits for credit
+  fifo    keep everything in order (a frame's meta JSON and JPEG are one
+          entry, so a binary is never replayed without its meta)
+
+After a reconnect the backlog is sent in order, ahead of newer messages.
+Connection attempts are spaced with exponential backoff and full jitter, so a
+hub restart does not bring every sender back in the same second.
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import random
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Union
+
+Part = Union[str, bytes]
+
+POLICY_LATEST = "latest"
+POLICY_FIFO = "fifo"
+DEFAULT_POLICIES: Dict[str, str] = {
+    "drone_state": POLICY_LATEST,
+    "frame": POLICY_FIFO,
+    "frame_meta": POLICY_FIFO,
+}
+
+
+class Backoff:
+    """Exponential backoff with full jitter: uniform(0, min(cap, base * 2**attempt))."""
+
+    def __init__(self, base_s: float = 0.5, cap_s: float = 30.0, rng: Optional[random.Random] = None):
+        self.base_s = base_s
+        self.cap_s = cap_s
+        self.rng = rng or random.Random()
+        self.attempt = 0
+
+    def next_delay(self) -> float:
+        ceiling = min(self.cap_s, self.base_s * (2 ** self.attempt))
+        self.attempt = min(self.attempt + 1, 32)
+        return self.rng.uniform(0.0, ceiling)
+
+    def reset(self) -> None:
+        self.attempt = 0
+
+
+@dataclass
+class Outgoing:
+    """One buffered entry; all of its parts are sent back to back."""
+
+    kind: str
+    parts: List[Part]
+    slot: Hashable
+    created: float = field(default_factory=time.monotonic)
+    size: int = 0
+
+    def __post_init__(self) -> None:
+        self.size = sum(len(p) for p in self.parts)
+
+
+@dataclass
+class TransportStats:
+    connects: int = 0
+    reconnects: int = 0
+    failed_connects: int = 0
+    sent: int = 0
+    replayed: int = 0
+    coalesced: int = 0
+    dropped_age: int = 0
+    dropped_bytes: int = 0
+    gaps: int = 0
+    gap_s: float = 0.0
+    max_gap_s: float = 0.0
+
+
+class ResendBuffer:
+    """Bounded, ordered outbox. Not thread-safe on its own; SenderTransport locks around it."""
+
+    def __init__(
+        self,
+        stats: TransportStats,
+        max_age_s: float = 30.0,
+        max_bytes: int = 16 * 1024 * 1024,
+        policies: Optional[Dict[str, str]] = None,
+    ):
+        self.stats = stats
+        self.max_age_s = max_age_s
+        self.max_bytes = max_bytes
+        self.policies = dict(DEFAULT_POLICIES if policies is None else policies)
+        self.bytes = 0
+        self._items: "OrderedDict[Hashable, Outgoing]" = OrderedDict()
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put(
+        self,
+        kind: str,
+        parts: List[Part],
+        key: Optional[Hashable] = None,
+        coalesce_before: float = float("inf"),
+    ) -> None:
+        """Queue an entry. A "latest" entry replaces the queued one for its key
+        if that one was created before ``coalesce_before``; otherwise both are kept."""
+        slot: Hashable = ("seq", next(self._seq))
+        if self.policies.get(kind, POLICY_FIFO) == POLICY_LATEST and key is not None:
+            old = self._items.get((kind, key))
+            if old is None:
+                slot = (kind, key)
+            elif old.created < coalesce_before:
+                slot = (kind, key)
+                del self._items[slot]
+                self.bytes -= old.size
+                self.stats.coalesced += 1
+        item = Outgoing(kind, list(parts), slot)
+        self._items[slot] = item
+        self.bytes += item.size
+        self.prune()
+
+    def prune(self) -> None:
+        """Drop from the head (oldest first) until the age and byte limits hold."""
+        now = time.monotonic()
+        while self._items:
+            item = next(iter(self._items.values()))
+            if self.max_age_s > 0 and now - item.created > self.max_age_s:
+                self.stats.dropped_age += 1
+            elif self.max_bytes > 0 and self.bytes > self.max_bytes and len(self._items) > 1:
+                self.stats.dropped_bytes += 1
+            else:
+                break
+            self._items.popitem(last=False)
+            self.bytes -= item.size
+
+    def pop(self) -> Optional[Outgoing]:
+        self.prune()
+        if not self._items:
+            return None
+        _, item = self._items.popitem(last=False)
+        self.bytes -= item.size
+        return item
+
+    def requeue(self, item: Outgoing) -> None:
+        """Put back an entry whose send failed, unless a newer one has replaced it."""
+        if item.slot in self._items:
+            return
+        self._items[item.slot] = item
+        self._items.move_to_end(item.slot, last=False)
+        self.bytes += item.size
+
+
+class SenderTransport:
+    """Connection state, backoff and resend buffer for one sender connection."""
+
+    def __init__(
+        self,
+        max_age_s: float = 30.0,
+        max_bytes: int = 16 * 1024 * 1024,
+        backoff_base_s: float = 0.5,
+        backoff_cap_s: float = 30.0,
+        stable_s: float = 5.0,
+        policies: Optional[Dict[str, str]] = None,
+        rng: Optional[random.Random] = None,
+    ):
+        self._cond = threading.Condition()
+        self.stats = TransportStats()
+        self.buffer = ResendBuffer(self.stats, max_age_s, max_bytes, policies)
+        self.backoff = Backoff(backoff_base_s, backoff_cap_s, rng)
+        # A connection that lived this long resets the backoff when it drops
+        self.stable_s = stable_s
+        self.connected = False
+        self._ever_connected = False
+        self._connected_at = 0.0
+        self._disconnected_at: Optional[float] = None
+        self._replay_before = 0.0
+        self._next_attempt = 0.0
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace) -> "SenderTransport":
+        return cls(
+            max_age_s=args.buffer_max_age,
+            max_bytes=int(args.buffer_max_mb * 1024 * 1024),
+            backoff_base_s=args.backoff_base,
+            backoff_cap_s=args.backoff_max,
+        )
+
+    # ---- producer side ----
+
+    def put(self, kind: str, parts: List[Part], key: Optional[Hashable] = None) -> None:
+        with self._cond:
+            # Merge only the backlog of a disconnect: entries queued while connected
+            # are live updates waiting for credit and all of them go out
+            coalesce_before = self._replay_before if self.connected else float("inf")
+            self.buffer.put(kind, parts, key, coalesce_before)
+            self._cond.notify_all()
+
+    def put_message(self, msg: dict) -> None:
+        """Queue one JSON message (drone_state is keyed by droneId)."""
+        self.put(msg.get("kind", "message"), [json.dumps(msg)], msg.get("droneId"))
+
+    def wait_for_items(self, timeout: float) -> bool:
+        with self._cond:
+            if not len(self.buffer):
+                self._cond.wait(timeout)
+            return bool(len(self.buffer))
+
+    # ---- connection state ----
+
+    def connect_due(self) -> bool:
+        return self.seconds_until_attempt() <= 0
+
+    def seconds_until_attempt(self) -> float:
+        with self._cond:
+            return 0.0 if self.connected else max(0.0, self._next_attempt - time.monotonic())
+
+    def on_connected(self) -> None:
+        with self._cond:
+            now = time.monotonic()
+            self.stats.connects += 1
+            if self._disconnected_at is not None:
+                gap = now - self._disconnected_at
+                self.stats.reconnects += 1
+                self.stats.gaps += 1
+                self.stats.gap_s += gap
+                self.stats.max_gap_s = max(self.stats.max_gap_s, gap)
+                self._replay_before = now
+                self._disconnected_at = None
+            self.connected = True
+            self._ever_connected = True
+            self._connected_at = now
+
+    def on_disconnected(self) -> float:
+        """Record a dropped connection or failed attempt; returns the delay before the next attempt."""
+        with self._cond:
+            now = time.monotonic()
+            if self.connected:
+                if now - self._connected_at >= self.stable_s:
+                    self.backoff.reset()
+                self.connected = False
+                self._disconnected_at = now
+            else:
+                self.stats.failed_connects += 1
+                if self._ever_connected and self._disconnected_at is None:
+                    self._disconnected_at = now
+            delay = self.backoff.next_delay()
+            self._next_attempt = now + delay
+            return delay
+
+    # ---- sending ----
+
+    def _pop(self) -> Optional[Outgoing]:
+        with self._cond:
+            return self.buffer.pop()
+
+    def _done(self, item: Outgoing) -> None:
+        with self._cond:
+            self.stats.sent += 1
+            if item.created < self._replay_before:
+                self.stats.replayed += 1
+
+    def _failed(self, item: Outgoing) -> None:
+        with self._cond:
+            self.buffer.requeue(item)
+
+    def flush(self, send: Callable[[Outgoing], None]) -> int:
+        """Send queued entries in order until empty. A failed entry is requeued and the error re-raised."""
+        count = 0
+        while True:
+            item = self._pop()
+            if item is None:
+                return count
+            try:
+                send(item)
+            except BaseException:
+                self._failed(item)
+                raise
+            self._done(item)
+            count += 1
+
+    async def flush_async(self, send: Callable[[Outgoing], Awaitable[None]]) -> int:
+        """asyncio variant of flush()."""
+        count = 0
+        while True:
+            item = self._pop()
+            if item is None:
+                return count
+            try:
+                await send(item)
+            except BaseException:
+                self._failed(item)
+                raise
+            self._done(item)
+            count += 1
+
+    # ---- reporting ----
+
+    def summary(self) -> dict:
+        with self._cond:
+            data = dict(vars(self.stats))
+            data["buffered"] = len(self.buffer)
+            data["buffered_bytes"] = self.buffer.bytes
+            data["gap_s"] = round(data["gap_s"], 3)
+            data["max_gap_s"] = round(data["max_gap_s"], 3)
+            return data
+
+    def format_stats(self) -> str:
+        s = self.summary()
+        return (
+            f"reconnects={s['reconnects']} replayed={s['replayed']} buffered={s['buffered']} "
+            f"dropped={s['dropped_age'] + s['dropped_bytes']} coalesced={s['coalesced']} "
+            f"gap={s['gap_s']:.1f}s max_gap={s['max_gap_s']:.1f}s"
+        )
+
+
+def add_transport_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--buffer-max-age", type=float, default=30.0, help="Seconds a message may wait for a reconnect before it is dropped (0 = no limit).")
+    parser.add_argument("--buffer-max-mb", type=float, default=16.0, help="Resend buffer size in MB; oldest messages are dropped first (0 = no limit).")
+    parser.add_argument("--backoff-base", type=float, default=0.5, help="First reconnect delay ceiling in seconds (doubles per failed attempt, full jitter).")
+    parser.add_argument("--backoff-max", type=float, default=30.0, help="Maximum reconnect delay in seconds.")
@@ -48,11 +48,18 @@ import math
 import random
 import sys
 import time
+from collections import deque
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Iterable, List, Optional, Tuple
 import threading
 
+from flow_control import CreditWindow, wait_for_credit_async
+from profiling import PROFILER, add_profile_args, percentile, profile_session
+from sender_transport import SenderTransport, add_transport_args
+
+ACK_POLL_S = 0.5
+
 
 def iso_utc_now() -> str:
     # RFC3339/ISO string with milliseconds and Z
@@ -174,10 +181,25 @@ def build_parser() -> argparse.ArgumentParser:
     p.add_argument("--image-width", type=int, default=640, help="frame_meta image width")
     p.add_argument("--image-height", type=int, default=360, help="frame_meta image height")
     p.add_argument("--image-quality", type=int, default=75, help="frame_meta image quality (1-100)")
-    p.add_argument("--target", choices=["ws", "mqtt", "both"], default="ws", help="Where to send messages")
+    p.add_argument(
+        "--target",
+        choices=["ws", "mqtt", "both", "mqtt-fleet"],
+        default="ws",
+        help="Where to send messages (mqtt-fleet: drones/frames + drones/detections for a whole fleet)",
+    )
     p.add_argument("--mqtt-host", type=str, default="127.0.0.1", help="MQTT broker host")
     p.add_argument("--mqtt-port", type=int, default=1883, help="MQTT broker port")
     p.add_argument("--mqtt-topic", type=str, default=None, help="MQTT topic. Defaults to army/<drone-id>")
+    p.add_argument("--mqtt-qos", type=int, choices=[0, 1], default=1, help="QoS for --target mqtt-fleet")
+    p.add_argument("--mqtt-inflight", type=int, default=100, help="Max unacknowledged publishes (mqtt-fleet)")
+    p.add_argument("--mqtt-payloads", choices=["frames", "detections", "both"], default="both", help="Topics to publish (mqtt-fleet)")
+    p.add_argument("--mqtt-frames-topic", default="drones/frames", help="Frame topic (mqtt-fleet, MQTT_TOPIC_FRAME on the backend)")
+    p.add_argument("--mqtt-detections-topic", default="drones/detections", help="Detection topic (mqtt-fleet, MQTT_TOPIC_DRONE on the backend)")
+    p.add_argument("--fleet-size", type=int, default=20, help="Simulated drones, ids <drone-id>-N (mqtt-fleet)")
+    p.add_argument("--fleet-sources", type=int, default=2, help="Camera sources sharing the fleet, ids <source-id>-N (mqtt-fleet)")
+    p.add_argument("--duration", type=float, default=0.0, help="Stop after N seconds (mqtt-fleet, 0 = until Ctrl+C)")
+    add_transport_args(p)
+    add_profile_args(p)
     return p
 
 
@@ -210,32 +232,61 @@ def ensure_mqtt_client():
         )
 
 
-def run_with_websocket_client(url: str, gen_messages: Iterable[dict]):
+def run_with_websocket_client(url: str, gen_messages: Iterable[dict], transport: Optional[SenderTransport] = None):
     import websocket  # type: ignore
 
+    transport = transport or SenderTransport()
+
+    # Keep producing while disconnected so the backlog can be replayed
+    def produce():
+        for msg in gen_messages:
+            with PROFILER.stage("json.dumps"):
+                transport.put_message(msg)
+
+    threading.Thread(target=produce, daemon=True).start()
+
     def connect():
+        # Credits are per connection: a fresh hub context starts with nothing in flight
+        window = CreditWindow()
+        is_open = threading.Event()
+
         # WebSocketApp handles ping/pong and reconnect hooks
         app = websocket.WebSocketApp(
             url,
-            on_open=lambda ws: print(f"[ws] connected: {url}", flush=True),
-            on_close=lambda ws, *_: print("[ws] closed", flush=True),
+            on_message=lambda ws, msg: window.feed(msg),
+            on_close=lambda ws, *_: print(f"[ws] closed ({window.format_stats()})", flush=True),
             on_error=lambda ws, err: print(f"[ws] error: {err}", flush=True),
         )
 
         # Start the sender in a separate thread so the IO loop can run freely
         def run_sender(wsapp: websocket.WebSocketApp):  # type: ignore
             sent = 0
-            for msg in gen_messages:
+
+            def send(item):
+                nonlocal sent
+                with PROFILER.stage("send"):
+                    for part in item.parts:
+                        while not window.acquire(timeout=ACK_POLL_S):
+                            if not is_open.is_set():
+                                raise ConnectionError("connection closed")
+                        wsapp.send(part)
+                sent += 1
+                if sent % 10 == 0:
+                    print(f"[send] {sent} messages ({window.format_stats()}; {transport.format_stats()})", flush=True)
+
+            while is_open.is_set():
                 try:
-                    wsapp.send(json.dumps(msg))
-                    sent += 1
-                    if sent % 10 == 0:
-                        print(f"[send] {sent} messages", flush=True)
+                    transport.flush(send)
                 except Exception as e:
                     print(f"[send] failed: {e}", flush=True)
+                    wsapp.close()
                     break
+                transport.wait_for_items(ACK_POLL_S)
 
         def on_open(ws):
+            print(f"[ws] connected: {url}", flush=True)
+            transport.on_connected()
+            is_open.set()
             t = threading.Thread(target=run_sender, args=(app,), daemon=True)
             t.start()
             print("[ws] sender thread started", flush=True)
@@ -243,9 +294,12 @@ def run_with_websocket_client(url: str, gen_messages: Iterable[dict]):
         app.on_open = on_open  # type: ignore
 
         # Blocking run; returns on disconnect or error
-        app.run_forever(ping_interval=20, ping_timeout=10)
+        try:
+            app.run_forever(ping_interval=20, ping_timeout=10)
+        finally:
+            is_open.clear()
 
-    # Reconnect loop
+    # Reconnect loop with exponential backoff and jitter
     while True:
         try:
             connect()
@@ -253,8 +307,9 @@ def run_with_websocket_client(url: str, gen_messages: Iterable[dict]):
             raise
         except Exception as e:
             print(f"[ws] connect error: {e}", flush=True)
-        print("[ws] reconnect in 3s...", flush=True)
-        time.sleep(3)
+        delay = transport.on_disconnected()
+        print(f"[ws] reconnect in {delay:.1f}s ({transport.format_stats()})", flush=True)
+        time.sleep(delay)
 
 
 def run_with_mqtt(host: str, port: int, topic: str, gen_messages: Iterable[dict]):
@@ -277,8 +332,10 @@ def run_with_mqtt(host: str, port: int, topic: str, gen_messages: Iterable[dict]
     count = 0
     try:
         for msg in gen_messages:
-            payload = json.dumps(msg)
-            client.publish(topic, payload, qos=0)
+            with PROFILER.stage("json.dumps"):
+                payload = json.dumps(msg)
+            with PROFILER.stage("publish"):
+                client.publish(topic, payload, qos=0)
             count += 1
             if count % 10 == 0:
                 print(f"[mqtt] published {count} messages to {topic}")
@@ -289,34 +346,300 @@ def run_with_mqtt(host: str, port: int, topic: str, gen_messages: Iterable[dict]
         client.disconnect()
 
 
-async def run_with_websockets(url: str, gen_messages: Iterable[dict]):
-    import asyncio
+def detection_payload(drone_id: str, lat: float, lon: float, alt: float, speed_m_s: float, heading: float) -> dict:
+    """Legacy single-drone message for drones/detections (droneDetectionSchema)."""
+    return {
+        "drone_id": drone_id,
+        "timestamp": iso_utc_now(),
+        "latitude": round(lat, 7),
+        "longitude": round(lon, 7),
+        "altitude_m": round(alt, 2),
+        "speed_mps": round(speed_m_s, 3),
+        "angle_deg": round(heading, 2),
+    }
+
+
+def frame_payload(frame_id: int, source_id: str, objects: List[dict]) -> dict:
+    """Frame message for drones/frames (frameSchema), without image_base64."""
+    return {
+        "frame_id": frame_id,
+        "timestamp": iso_utc_now(),
+        "source_id": source_id,
+        "objects": objects,
+    }
+
+
+class PublishTracker:
+    """In-flight window and broker-ack latency for paho publishes (QoS 1 PUBACK)."""
+
+    def __init__(self, window: int, samples: int = 10000):
+        self._cond = threading.Condition()
+        self.window = max(1, window)
+        self.in_flight: dict = {}
+        # Acks that arrived before publish() returned its mid: mid -> ack time
+        self._early: dict = {}
+        self.latencies = deque(maxlen=samples)
+        self.published = 0
+        self.acked = 0
+        self.bytes = 0
+        self.stall_s = 0.0
+
+    def acquire(self, deadline: Optional[float] = None) -> bool:
+        """Wait for a free in-flight slot; False if time.monotonic() passed deadline first."""
+        with self._cond:
+            if len(self.in_flight) < self.window:
+                return True
+            t0 = time.monotonic()
+            try:
+                while len(self.in_flight) >= self.window:
+                    now = time.monotonic()
+                    if deadline is not None and now >= deadline:
+                        return False
+                    self._cond.wait(0.5 if deadline is None else min(0.5, deadline - now))
+                return True
+            finally:
+                self.stall_s += time.monotonic() - t0
+
+    def publish(self, client, topic: str, payload: str, qos: int, deadline: Optional[float] = None) -> bool:
+        """Publish once a slot is free; False (nothing sent) if the deadline passed while waiting."""
+        if not self.acquire(deadline):
+            return False
+        # Not under our lock: paho calls on_publish while holding its own message lock
+        t0 = time.perf_counter()
+        info = client.publish(topic, payload, qos=qos)
+        with self._cond:
+            self.published += 1
+            self.bytes += len(payload)
+            acked_at = self._early.pop(info.mid, None)
+            if acked_at is not None:
+                self._record(acked_at - t0)
+            else:
+                self.in_flight[info.mid] = t0
+        return True
+
+    def on_publish(self, mid: int) -> None:
+        with self._cond:
+            now = time.perf_counter()
+            t0 = self.in_flight.pop(mid, None)
+            if t0 is None:
+                self._early[mid] = now
+                return
+            self._record(now - t0)
+            self._cond.notify_all()
+
+    def _record(self, seconds: float) -> None:
+        self.acked += 1
+        self.latencies.append(seconds)
+
+    def summary(self, elapsed_s: float) -> dict:
+        with self._cond:
+            lat = sorted(self.latencies)
+            elapsed_s = max(1e-6, elapsed_s)
+            return {
+                "published": self.published,
+                "acked": self.acked,
+                "in_flight": len(self.in_flight),
+                "msgs_per_s": round(self.published / elapsed_s, 1),
+                "bytes_per_s": round(self.bytes / elapsed_s, 1),
+                "stall_s": round(self.stall_s, 3),
+                "ack_p50_ms": round(1000.0 * percentile(lat, 50), 3),
+                "ack_p95_ms": round(1000.0 * percentile(lat, 95), 3),
+                "ack_p99_ms": round(1000.0 * percentile(lat, 99), 3),
+                "ack_max_ms": round(1000.0 * lat[-1], 3) if lat else 0.0,
+            }
+
+
+def format_publish_stats(s: dict) -> str:
+    return (
+        f"published={s['published']} acked={s['acked']} in_flight={s['in_flight']} "
+        f"msgs/s={s['msgs_per_s']:.0f} kB/s={s['bytes_per_s'] / 1024:.0f} stall={s['stall_s']:.1f}s "
+        f"ack p50={s['ack_p50_ms']:.1f}ms p95={s['ack_p95_ms']:.1f}ms p99={s['ack_p99_ms']:.1f}ms"
+    )
+
+
+def run_mqtt_fleet(args: argparse.Namespace) -> int:
+    """Publish drones/frames and drones/detections for a simulated fleet, as src/mqtt/ingest.ts expects."""
+    mqtt = ensure_mqtt_client()
+    try:
+        client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+    except AttributeError:  # paho-mqtt < 2.0
+        client = mqtt.Client()
+    tracker = PublishTracker(args.mqtt_inflight)
+
+    # Callbacks accept both the paho 1.x and 2.x argument lists
+    def on_disconnect(cl, userdata, *rest):  # type: ignore
+        rc = rest[1] if len(rest) >= 3 else (rest[0] if rest else None)
+        print(f"[mqtt] disconnected rc={rc}", flush=True)
+
+    client.on_connect = lambda cl, userdata, flags, rc, *_: print(f"[mqtt] connected rc={rc}", flush=True)
+    client.on_disconnect = on_disconnect
+    client.on_publish = lambda cl, userdata, mid, *_: tracker.on_publish(mid)
+    # Our own window decides what is in flight; don't let paho queue behind it
+    client.max_inflight_messages_set(max(args.mqtt_inflight, 1))
+    client.connect(args.mqtt_host, args.mqtt_port, keepalive=30)
+    client.loop_start()
+
+    rng = random.Random()
+    drone_ids = [f"{args.drone_id}-{i + 1}" for i in range(args.fleet_size)]
+    cursors = {
+        drone_id: PathCursor(
+            default_loop(args.start_lat + rng.uniform(-0.01, 0.01), args.start_lon + rng.uniform(-0.01, 0.01)),
+            args.speed,
+        )
+        for drone_id in drone_ids
+    }
+    source_ids = [f"{args.source_id}-{i + 1}" for i in range(max(1, args.fleet_sources))]
+    send_frames = args.mqtt_payloads in ("frames", "both")
+    send_detections = args.mqtt_payloads in ("detections", "both")
+    bbox_w = max(10, int(args.image_width * 0.1))
+    bbox_h = max(10, int(args.image_height * 0.1))
+    print(
+        f"[mqtt] fleet: {len(drone_ids)} drones, {len(source_ids)} sources, payloads={args.mqtt_payloads}, "
+        f"qos={args.mqtt_qos}, in-flight window={args.mqtt_inflight}"
+    )
+
+    started = time.monotonic()
+    # Also bounds waits for broker acks, so a stalled broker can't outlive --duration
+    deadline = started + args.duration if args.duration else None
+    last = started
+    next_report = started + 5.0
+    frame_id = 0
+    try:
+        while deadline is None or time.monotonic() < deadline:
+            tick = time.monotonic()
+            dt, last = tick - last, tick
+            objects_by_source: dict = {source_id: [] for source_id in source_ids}
+            for index, drone_id in enumerate(drone_ids):
+                with PROFILER.stage("generate"):
+                    lat, lon, heading = cursors[drone_id].step(dt)
+                if send_detections:
+                    with PROFILER.stage("json.dumps"):
+                        payload = json.dumps(detection_payload(drone_id, lat, lon, args.alt, args.speed, heading))
+                    with PROFILER.stage("publish"):
+                        if not tracker.publish(client, args.mqtt_detections_topic, payload, args.mqtt_qos, deadline):
+                            return 0
+                if send_frames:
+                    # Each drone is seen by one source; boxes are spread over the image
+                    col = index % 8
+                    row = (index // 8) % 8
+                    objects_by_source[source_ids[index % len(source_ids)]].append({
+                        "drone_id": drone_id,
+                        "type": "uav",
+                        "lat": round(lat, 7),
+                        "lon": round(lon, 7),
+                        "alt_m": round(args.alt, 2),
+                        "speed_mps": round(args.speed, 3),
+                        "bbox": [col * args.image_width // 8, row * args.image_height // 8, bbox_w, bbox_h],
+                        "confidence": 0.9,
+                        "timestamp": iso_utc_now(),
+                    })
+            if send_frames:
+                frame_id += 1
+                for source_id, objects in objects_by_source.items():
+                    with PROFILER.stage("json.dumps"):
+                        payload = json.dumps(frame_payload(frame_id, source_id, objects))
+                    with PROFILER.stage("publish"):
+                        if not tracker.publish(client, args.mqtt_frames_topic, payload, args.mqtt_qos, deadline):
+                            return 0
+
+            now = time.monotonic()
+            if now >= next_report:
+                print(f"[mqtt] {format_publish_stats(tracker.summary(now - started))}", flush=True)
+                next_report = now + 5.0
+            pause = args.interval - (now - tick)
+            if deadline is not None:
+                pause = min(pause, deadline - now)
+            time.sleep(max(0.0, pause))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        summary = tracker.summary(time.monotonic() - started)
+        client.loop_stop()
+        client.disconnect()
+        print(f"[mqtt] final {format_publish_stats(summary)}")
+    return 0
+
+
+async def run_with_websockets(url: str, gen_messages: Iterable[dict], transport: Optional[SenderTransport] = None):
     import websockets  # type: ignore
 
-    async def connect_once():
-        try:
-            async with websockets.connect(url, ping_interval=20, ping_timeout=10) as ws:  # type: ignore
+    transport = transport or SenderTransport()
+    ws = None
+    window: Optional[CreditWindow] = None
+    sent = 0
+
+    async def send(item):
+        nonlocal sent
+        with PROFILER.stage("send"):
+            for part in item.parts:
+                await wait_for_credit_async(ws, window)
+                await ws.send(part)
+        sent += 1
+        if sent % 10 == 0:
+            print(f"[send] {sent} messages ({window.format_stats()}; {transport.format_stats()})")
+
+    # Messages are queued even while disconnected; the backlog goes out first after a reconnect
+    for msg in gen_messages:
+        with PROFILER.stage("json.dumps"):
+            transport.put_message(msg)
+        if ws is None and transport.connect_due():
+            try:
+                ws = await websockets.connect(url, ping_interval=20, ping_timeout=10)  # type: ignore
+                window = CreditWindow()
+                transport.on_connected()
                 print(f"[ws] connected: {url}")
-                sent = 0
-                for msg in gen_messages:
-                    try:
-                        await ws.send(json.dumps(msg))
-                        sent += 1
-                        if sent % 10 == 0:
-                            print(f"[send] {sent} messages")
-                    except Exception as e:
-                        print(f"[send] failed: {e}")
-                        break
+            except Exception as e:
+                delay = transport.on_disconnected()
+                print(f"[ws] connect error: {e}; retry in {delay:.1f}s")
+        if ws is None:
+            continue
+        try:
+            await transport.flush_async(send)
         except Exception as e:
-            print(f"[ws] connect error: {e}")
+            delay = transport.on_disconnected()
+            print(f"[send] failed: {e}; reconnect in {delay:.1f}s ({transport.format_stats()})")
+            try:
+                await ws.close()
+            except Exception:
+                pass
+            ws = None
 
-    while True:
-        try:
-            await connect_once()
-        except KeyboardInterrupt:
-            raise
-        print("[ws] reconnect in 3s...")
-        await asyncio.sleep(3)
+
+def drone_state_message(
+    drone_id: str,
+    lat: float,
+    lon: float,
+    alt: float,
+    speed_m_s: float,
+    heading: float,
+    battery: float,
+    signal_ok: bool,
+    signal_loss_prob: float,
+) -> dict:
+    return {
+        "kind": "drone_state",
+        "droneId": drone_id,
+        "lat": round(lat, 7),
+        "lon": round(lon, 7),
+        "alt_m": round(alt, 2),
+        "speed_m_s": round(speed_m_s, 3),
+        "heading_deg": round(heading, 2),
+        "battery_pct": round(battery, 2),
+        "signal_ok": bool(signal_ok),
+        "signal_loss_prob": max(0.0, min(1.0, float(signal_loss_prob))),
+        "ts": iso_utc_now(),
+    }
+
+
+def default_loop(lat: float, lon: float) -> List[Waypoint]:
+    """Small closed loop starting and ending at (lat, lon)."""
+    return [
+        Waypoint(lat, lon),
+        Waypoint(lat + 0.0010, lon + 0.0010),
+        Waypoint(lat + 0.0015, lon - 0.0012),
+        Waypoint(lat - 0.0006, lon - 0.0009),
+        Waypoint(lat, lon),
+    ]
 
 
 def message_generator(
@@ -346,39 +669,27 @@ def message_generator(
     last_time = time.time()
 
     while True:
-        now = time.time()
-        dt = max(0.001, now - last_time)
-        last_time = now
-
-        if waypoints:
-            lat, lon, heading = cursor.step(dt)
-        else:
-            # Random walk around the starting point
-            heading = (heading + rng.uniform(-10, 10)) % 360.0
-            # crude lat/lon step based on speed (ignores curvature, okay for small moves)
-            dx = speed_m_s * dt
-            dlat = (dx * math.cos(to_rad(heading))) / EARTH_RADIUS_M
-            dlon = (dx * math.sin(to_rad(heading))) / (EARTH_RADIUS_M * math.cos(to_rad(lat)))
-            lat += to_deg(dlat)
-            lon += to_deg(dlon)
-
-        battery = max(0.0, battery - battery_drain_per_s * dt)
-        signal_ok = rng.random() >= signal_loss_prob
-
-        msg = {
-            "kind": "drone_state",
-            "droneId": drone_id,
-            "lat": round(lat, 7),
-            "lon": round(lon, 7),
-            "alt_m": round(alt, 2),
-            "speed_m_s": round(speed_m_s, 3),
-            "heading_deg": round(heading, 2),
-            "battery_pct": round(battery, 2),
-            "signal_ok": bool(signal_ok),
-            "signal_loss_prob": max(0.0, min(1.0, float(signal_loss_prob))),
-            "ts": iso_utc_now(),
-        }
-
+        with PROFILER.stage("generate"):
+            now = time.time()
+            dt = max(0.001, now - last_time)
+            last_time = now
+
+            if waypoints:
+                lat, lon, heading = cursor.step(dt)
+            else:
+                # Random walk around the starting point
+                heading = (heading + rng.uniform(-10, 10)) % 360.0
+                # crude lat/lon step based on speed (ignores curvature, okay for small moves)
+                dx = speed_m_s * dt
+                dlat = (dx * math.cos(to_rad(heading))) / EARTH_RADIUS_M
+                dlon = (dx * math.sin(to_rad(heading))) / (EARTH_RADIUS_M * math.cos(to_rad(lat)))
+                lat += to_deg(dlat)
+                lon += to_deg(dlon)
+
+            battery = max(0.0, battery - battery_drain_per_s * dt)
+            signal_ok = rng.random() >= signal_loss_prob
+
+            msg = drone_state_message(drone_id, lat, lon, alt, speed_m_s, heading, battery, signal_ok, signal_loss_prob)
         yield msg
         time.sleep(max(0.01, interval_s))
 
@@ -401,51 +712,49 @@ def frame_meta_generator(
     bbox_x = max(0, int(width * 0.4))
     bbox_y = max(0, int(height * 0.4))
     while True:
-        lat, lon, heading = cursor.step(interval_s)
-        frame_id += 1
-        meta = {
-            "kind": "frame_meta",
-            "frame_id": frame_id,
-            "timestamp": iso_utc_now(),
-            "source_id": source_id,
-            "image_info": {
-                "mime": "image/jpeg",
-                "width": int(width),
-                "height": int(height),
-                "quality": int(max(1, min(100, quality))),
-            },
-            "objects": [
-                {
-                    "drone_id": drone_id,
-                    "type": "uav",
-                    "lat": round(lat, 7),
-                    "lon": round(lon, 7),
-                    "alt_m": round(base_alt, 2),
-                    "speed_mps": round(speed_m_s, 3),
-                    "bbox": [bbox_x, bbox_y, bbox_w, bbox_h],
-                    "confidence": 0.92,
-                    "timestamp": iso_utc_now(),
-                }
-            ],
-        }
+        with PROFILER.stage("generate"):
+            lat, lon, heading = cursor.step(interval_s)
+            frame_id += 1
+            meta = {
+                "kind": "frame_meta",
+                "frame_id": frame_id,
+                "timestamp": iso_utc_now(),
+                "source_id": source_id,
+                "image_info": {
+                    "mime": "image/jpeg",
+                    "width": int(width),
+                    "height": int(height),
+                    "quality": int(max(1, min(100, quality))),
+                },
+                "objects": [
+                    {
+                        "drone_id": drone_id,
+                        "type": "uav",
+                        "lat": round(lat, 7),
+                        "lon": round(lon, 7),
+                        "alt_m": round(base_alt, 2),
+                        "speed_mps": round(speed_m_s, 3),
+                        "bbox": [bbox_x, bbox_y, bbox_w, bbox_h],
+                        "confidence": 0.92,
+                        "timestamp": iso_utc_now(),
+                    }
+                ],
+            }
         yield meta
         time.sleep(max(0.01, interval_s))
 
 
 def main(argv: Optional[List[str]] = None) -> int:
     args = build_parser().parse_args(argv)
+    with profile_session(args, "sentbackend"):
+        return run(args)
+
 
+def run(args: argparse.Namespace) -> int:
     waypoints = parse_path_arg(args.path)
     if waypoints is None:
         # If no path provided, use start lat/lon and create a small loop
-        base = Waypoint(lat=float(args.start_lat), lon=float(args.start_lon))
-        waypoints = [
-            Waypoint(base.lat, base.lon),
-            Waypoint(base.lat + 0.0010, base.lon + 0.0010),
-            Waypoint(base.lat + 0.0015, base.lon - 0.0012),
-            Waypoint(base.lat - 0.0006, base.lon - 0.0009),
-            Waypoint(base.lat, base.lon),
-        ]
+        waypoints = default_loop(float(args.start_lat), float(args.start_lon))
 
     if args.mode == "drone_state":
         gen = message_generator(
@@ -473,6 +782,8 @@ def main(argv: Optional[List[str]] = None) -> int:
 
     # Determine target(s)
     target = args.target
+    if target == "mqtt-fleet":
+        return run_mqtt_fleet(args)
     if target in ("mqtt", "both"):
         # The backend's MQTT consumer currently only processes topic army/drone1.
         # Ensure your --drone-id is drone1, or adjust server to accept wildcard.
@@ -518,10 +829,10 @@ def main(argv: Optional[List[str]] = None) -> int:
     print(f"Using WS implementation: {impl}")
     try:
         if impl == "websocket-client":
-            run_with_websocket_client(args.url, gen)
+            run_with_websocket_client(args.url, gen, SenderTransport.from_args(args))
         else:
             import asyncio
-            asyncio.run(run_with_websockets(args.url, gen))
+            asyncio.run(run_with_websockets(args.url, gen, SenderTransport.from_args(args)))
     except KeyboardInterrupt:
         print("Interrupted by user")
         return 130
@@ -3,12 +3,10 @@ import { mqttClient } from "./client.js";
 import { droneDetectionSchema } from "../schemas/drone-detection.js";
 import { frameSchema } from "../schemas/frame.js";
 import { saveRaw } from "../services/raw.js";
-import { saveDroneDetection, saveDroneDetectionFromFrame } from "../services/drone-detections.js";
+import { frameDetectionRows, saveDetectionRow, saveDroneDetection } from "../services/drone-detections.js";
 import { saveFrame } from "../services/frames.js";
 import { broadcast } from "../ws/hub.js";
-
-const TOPIC_DRONE = process.env.MQTT_TOPIC_DRONE || "drones/detections";
-const TOPIC_FRAME = process.env.MQTT_TOPIC_FRAME || "drones/frames";
+import { TOPIC_DRONE, TOPIC_FRAME } from "./topics.js";
 
 const CONFIDENT_PASS_WS = (()=> {
   const confident = Number(process.env.CONFIDENT_PASS_WS);
@@ -76,37 +74,10 @@ mqttClient.on("message", async (topic, message) => {
       if (frame.image_base64) frameParams.imageBase64 = frame.image_base64;
       const frameId = await saveFrame(frameParams);
 
-      // save each object as detection
-      for (const obj of frame.objects) {
-        // build detection params without undefined fields
-        const detParams: {
-          droneId: string;
-          deviceTs: Date;
-          lat: number;
-          lon: number;
-          altM: number;
-          speedMps: number;
-          sourceId: string;
-          type?: string;
-          confidence?: number;
-          bbox?: [number, number, number, number];
-          frameId?: bigint;
-          rawId?: bigint;
-        } = {
-          droneId: obj.drone_id,
-          deviceTs: (obj.timestamp as Date | undefined) ?? frame.timestamp,
-          lat: obj.lat,
-          lon: obj.lon,
-          altM: obj.alt_m,
-          speedMps: obj.speed_mps,
-          sourceId: frame.source_id,
-          bbox: obj.bbox,
-          frameId,
-          rawId,
-        };
-        if (typeof obj.type === "string") detParams.type = obj.type;
-        if (typeof obj.confidence === "number") detParams.confidence = obj.confidence;
-        const detId = await saveDroneDetectionFromFrame(detParams);
+      // save each object as detection (same rows as the bulk reprocessing)
+      const rows = frameDetectionRows(frame, frameId, rawId);
+      for (const [i, obj] of frame.objects.entries()) {
+        await saveDetectionRow(rows[i]!);
 
         const conf = typeof obj.confidence === "number" ? obj.confidence : undefined;
         const passes = 
@@ -0,0 +1,4 @@
+// src/mqtt/topics.ts
+// Detection topics, shared by the live ingest and the raw-message reprocessing
+export const TOPIC_DRONE = process.env.MQTT_TOPIC_DRONE || "drones/detections";
+export const TOPIC_FRAME = process.env.MQTT_TOPIC_FRAME || "drones/frames";
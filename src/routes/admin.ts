@@ -3,6 +3,19 @@ import type { FastifyInstance } from "fastify";
 import { getRawById } from "../services/raw.js";
 import { droneDetectionSchema } from "../schemas/drone-detection.js";
 import { saveDroneDetection } from "../services/drone-detections.js";
+import { rebuildRollups } from "../services/rollups.js";
+import {
+  REPROCESS_DEFAULT_BATCH,
+  REPROCESS_DEFAULT_CONCURRENCY,
+  REPROCESS_MAX_BATCH,
+  REPROCESS_MAX_CONCURRENCY,
+  createReprocessJob,
+  describeReprocessJob,
+  getReprocessJob,
+  listReprocessJobs,
+  pauseReprocessJob,
+  startReprocessJob,
+} from "../services/reprocess.js";
 
 const adminReprocessBodySchema = {
   type: "object",
@@ -36,6 +49,80 @@ const adminErrorResponseSchema = {
   required: ["ok", "error"],
 };
 
+const adminRollupRebuildBodySchema = {
+  type: "object",
+  additionalProperties: false,
+  required: ["start", "end"],
+  properties: {
+    source: { type: "string", enum: ["READING", "DETECTION"], default: "READING" },
+    start: { type: "string", format: "date-time" },
+    end: { type: "string", format: "date-time" },
+    droneId: { type: "string", description: "Only rebuild this drone's buckets." },
+  },
+};
+
+const reprocessJobBodySchema = {
+  type: "object",
+  additionalProperties: false,
+  properties: {
+    topic: { type: "string", description: "Only rows of this MQTT topic." },
+    from: { type: "string", format: "date-time", description: "Inclusive start of RawMessage.receivedAt." },
+    to: { type: "string", format: "date-time", description: "Inclusive end of RawMessage.receivedAt." },
+    parseOk: { type: "boolean", default: false, description: "Parse state to select (default: failed rows)." },
+    errorPattern: { type: "string", description: "Case-insensitive substring of the stored error." },
+    batchSize: { type: "integer", minimum: 1, maximum: REPROCESS_MAX_BATCH, default: REPROCESS_DEFAULT_BATCH },
+    concurrency: { type: "integer", minimum: 1, maximum: REPROCESS_MAX_CONCURRENCY, default: Math.min(REPROCESS_DEFAULT_CONCURRENCY, REPROCESS_MAX_CONCURRENCY) },
+  },
+};
+
+const nullableString = { type: ["string", "null"] };
+const nullableDate = { type: ["string", "null"], format: "date-time" };
+
+const reprocessJobSchema = {
+  type: "object",
+  additionalProperties: false,
+  properties: {
+    id: { type: "string" },
+    status: { type: "string", enum: ["PENDING", "RUNNING", "PAUSING", "PAUSED", "DONE", "FAILED"] },
+    running: { type: "boolean" },
+    filter: {
+      type: "object",
+      additionalProperties: false,
+      properties: {
+        topic: nullableString,
+        receivedFrom: nullableDate,
+        receivedTo: nullableDate,
+        parseOk: { type: "boolean" },
+        errorPattern: nullableString,
+      },
+    },
+    batchSize: { type: "integer" },
+    concurrency: { type: "integer" },
+    cursorId: { type: "string", description: "Every raw id up to this one has been processed." },
+    total: { type: "integer", description: "Matching rows when the job was created." },
+    scanned: { type: "integer" },
+    succeeded: { type: "integer" },
+    failed: { type: "integer" },
+    frames: { type: "integer" },
+    detections: { type: "integer" },
+    progress: { type: "number" },
+    rowsPerSec: { type: "number" },
+    etaSeconds: { type: ["integer", "null"] },
+    activeSeconds: { type: "integer" },
+    lastError: nullableString,
+    createdAt: { type: "string", format: "date-time" },
+    startedAt: nullableDate,
+    finishedAt: nullableDate,
+    updatedAt: { type: "string", format: "date-time" },
+  },
+};
+
+const reprocessJobIdParamsSchema = {
+  type: "object",
+  required: ["id"],
+  properties: { id: { type: "string", pattern: "^[0-9]+$" } },
+};
+
 export default async function adminRoutes(app: FastifyInstance) {
   // reprocess จาก raw id (พร้อม patch บางฟิลด์)
   app.post("/admin/reprocess/:rawId", {
@@ -77,4 +164,139 @@ export default async function adminRoutes(app: FastifyInstance) {
       return reply.code(400).send({ ok: false, error: e?.message ?? String(e) });
     }
   });
+
+  // คำนวณ rollup ใหม่จากข้อมูลดิบ (backfill / ซ่อม bucket)
+  app.post("/admin/rollups/rebuild", {
+    schema: {
+      tags: ["Admin"],
+      summary: "Recompute drone history rollups for a time range from the raw rows.",
+      body: adminRollupRebuildBodySchema,
+      response: {
+        200: {
+          type: "object",
+          additionalProperties: false,
+          properties: {
+            ok: { type: "boolean", const: true },
+            buckets: { type: "integer", description: "Bucket rows written." },
+          },
+          required: ["ok", "buckets"],
+        },
+        400: adminErrorResponseSchema,
+      },
+    },
+  }, async (req, reply) => {
+    const body = req.body as { source?: "READING" | "DETECTION"; start: string; end: string; droneId?: string };
+    const start = new Date(body.start);
+    const end = new Date(body.end);
+    if (Number.isNaN(start.getTime()) || Number.isNaN(end.getTime()) || start > end) {
+      return reply.code(400).send({ ok: false, error: "start/end must be valid ISO dates with start <= end" });
+    }
+    const buckets = await rebuildRollups({
+      source: body.source ?? "READING",
+      start,
+      end,
+      ...(body.droneId ? { droneId: body.droneId } : {}),
+    });
+    return { ok: true, buckets };
+  });
+
+  // รีโปรเซสแบบเป็นชุดตามตัวกรอง (ทำงานเบื้องหลัง, resume ได้จาก checkpoint)
+  app.post("/admin/reprocess-jobs", {
+    schema: {
+      tags: ["Admin"],
+      summary: "Start a bulk reprocess job over stored raw rows matching a filter.",
+      body: reprocessJobBodySchema,
+      response: {
+        202: reprocessJobSchema,
+        400: adminErrorResponseSchema,
+      },
+    },
+  }, async (req, reply) => {
+    const body = (req.body as any) ?? {};
+    const from = body.from ? new Date(body.from) : undefined;
+    const to = body.to ? new Date(body.to) : undefined;
+    if ((from && Number.isNaN(from.getTime())) || (to && Number.isNaN(to.getTime())) || (from && to && from > to)) {
+      return reply.code(400).send({ ok: false, error: "from/to must be valid ISO dates with from <= to" });
+    }
+    const job = await createReprocessJob({
+      ...(body.topic ? { topic: body.topic } : {}),
+      ...(from ? { receivedFrom: from } : {}),
+      ...(to ? { receivedTo: to } : {}),
+      ...(typeof body.parseOk === "boolean" ? { parseOk: body.parseOk } : {}),
+      ...(body.errorPattern ? { errorPattern: body.errorPattern } : {}),
+      ...(body.batchSize ? { batchSize: body.batchSize } : {}),
+      ...(body.concurrency ? { concurrency: body.concurrency } : {}),
+    });
+    startReprocessJob(job.id);
+    return reply.code(202).send(describeReprocessJob(job));
+  });
+
+  app.get("/admin/reprocess-jobs", {
+    schema: {
+      tags: ["Admin"],
+      summary: "List recent bulk reprocess jobs with progress.",
+      response: {
+        200: { type: "array", items: reprocessJobSchema },
+      },
+    },
+  }, async () => {
+    const jobs = await listReprocessJobs();
+    return jobs.map(describeReprocessJob);
+  });
+
+  app.get("/admin/reprocess-jobs/:id", {
+    schema: {
+      tags: ["Admin"],
+      summary: "Progress and throughput of one bulk reprocess job.",
+      params: reprocessJobIdParamsSchema,
+      response: {
+        200: reprocessJobSchema,
+        404: adminErrorResponseSchema,
+      },
+    },
+  }, async (req, reply) => {
+    const job = await getReprocessJob(BigInt((req.params as any).id));
+    if (!job) return reply.code(404).send({ ok: false, error: "job not found" });
+    return describeReprocessJob(job);
+  });
+
+  app.post("/admin/reprocess-jobs/:id/pause", {
+    schema: {
+      tags: ["Admin"],
+      summary: "Pause a running job after its in-flight batches finish.",
+      params: reprocessJobIdParamsSchema,
+      response: {
+        200: reprocessJobSchema,
+        404: adminErrorResponseSchema,
+        409: adminErrorResponseSchema,
+      },
+    },
+  }, async (req, reply) => {
+    const id = BigInt((req.params as any).id);
+    const job = await getReprocessJob(id);
+    if (!job) return reply.code(404).send({ ok: false, error: "job not found" });
+    if (!pauseReprocessJob(id)) return reply.code(409).send({ ok: false, error: "job is not running" });
+    // PAUSING while in-flight batches finish, PAUSED if that already happened
+    return describeReprocessJob((await getReprocessJob(id)) ?? job);
+  });
+
+  app.post("/admin/reprocess-jobs/:id/resume", {
+    schema: {
+      tags: ["Admin"],
+      summary: "Resume a paused, failed or interrupted job from its checkpoint.",
+      params: reprocessJobIdParamsSchema,
+      response: {
+        202: reprocessJobSchema,
+        404: adminErrorResponseSchema,
+        409: adminErrorResponseSchema,
+      },
+    },
+  }, async (req, reply) => {
+    const id = BigInt((req.params as any).id);
+    const job = await getReprocessJob(id);
+    if (!job) return reply.code(404).send({ ok: false, error: "job not found" });
+    if (job.status === "DONE") return reply.code(409).send({ ok: false, error: "job already finished" });
+    if (!startReprocessJob(id)) return reply.code(409).send({ ok: false, error: "job is already running" });
+    return reply.code(202).send(describeReprocessJob(job));
+  });
 }
@@ -1,6 +1,7 @@
 // src/routes/api-drones.ts
 import type { FastifyInstance, FastifyPluginOptions } from "fastify";
 import { prisma } from "../db/prisma.js";
+import { RESOLUTIONS, pickBucket, queryRollups, type Resolution } from "../services/rollups.js";
 
 const droneSummarySchema = {
   type: "object",
@@ -39,6 +40,9 @@ const droneHistoryRowSchema = {
     batteryPct: { type: ["number", "null"] },
     signalOk: { type: ["boolean", "null"] },
     signalLossProb: { type: ["number", "null"] },
+    // rollup rows only: bucket size in seconds and samples merged into it
+    bucketSec: { type: "integer" },
+    count: { type: "integer" },
   },
 };
 
@@ -57,6 +61,8 @@ const dronePathPointSchema = {
     altM: { type: ["number", "null"] },
     speedMS: { type: ["number", "null"] },
     headingDeg: { type: ["number", "null"] },
+    batteryPct: { type: ["number", "null"] },
+    count: { type: "integer" },
   },
 };
 
@@ -66,6 +72,7 @@ const dronePathResponseSchema = {
   properties: {
     droneId: { type: "string" },
     count: { type: "integer" },
+    bucketSec: { type: ["integer", "null"] },
     path: {
       type: "array",
       items: dronePathPointSchema,
@@ -73,6 +80,37 @@ const dronePathResponseSchema = {
   },
 };
 
+// Optional time range + resolution shared by the history and path endpoints
+const rangeQueryProperties = {
+  start: { type: "string", format: "date-time", description: "Inclusive start of the range." },
+  end: { type: "string", format: "date-time", description: "Inclusive end of the range (default now)." },
+  resolution: {
+    type: "string",
+    enum: [...RESOLUTIONS],
+    default: "auto",
+    description: "Bucket size (1s, 1m, 1h), raw readings, or auto: the smallest bucket that fits the whole range into the row limit.",
+  },
+};
+
+function parseRange(query: any): { start?: Date; end?: Date; resolution: Resolution } | null {
+  const start = query?.start ? new Date(query.start) : undefined;
+  const end = query?.end ? new Date(query.end) : undefined;
+  if ((start && Number.isNaN(start.getTime())) || (end && Number.isNaN(end.getTime()))) return null;
+  if (start && end && start > end) return null;
+  return {
+    ...(start ? { start } : {}),
+    ...(end ? { end } : {}),
+    resolution: (query?.resolution ?? "auto") as Resolution,
+  };
+}
+
+// Bucket to read for a query; auto needs a start to know the range, otherwise it stays raw.
+// Callers fall back to raw rows when the bucket has no rollups yet.
+function bucketFor(range: { start?: Date; end?: Date; resolution: Resolution }, points: number) {
+  if (!range.start && range.resolution === "auto") return null;
+  return pickBucket(range.start ?? new Date(0), range.end ?? new Date(), points, range.resolution);
+}
+
 const waypointSchema = {
   type: "object",
   additionalProperties: false,
@@ -167,19 +205,60 @@ export default async function apiDronesRoutes(app: FastifyInstance, _opts: Fasti
             maximum: 1000,
             default: 200,
           },
+          ...rangeQueryProperties,
         },
       },
       response: {
         200: droneHistoryListSchema,
+        400: {
+          type: "object",
+          properties: { error: { type: "string" } },
+        },
       },
     },
-  }, async (req) => {
+  }, async (req, reply) => {
     const id = (req.params as any)?.id as string;
     const limit = Number((req.query as any)?.limit ?? 200);
+    const take = Number.isFinite(limit) ? Math.max(1, Math.min(limit, 1000)) : 200;
+    const range = parseRange(req.query);
+    if (!range) {
+      return reply.status(400).send({ error: "start/end must be valid ISO dates with start <= end" });
+    }
+
+    const bucketSec = bucketFor(range, take);
+    if (bucketSec !== null) {
+      const buckets = await queryRollups({
+        droneIds: [id],
+        source: "READING",
+        bucketSec,
+        ...(range.start ? { start: range.start } : {}),
+        ...(range.end ? { end: range.end } : {}),
+        order: "desc",
+        take,
+      });
+      if (buckets.length) {
+        return buckets.map((b) => ({
+          id: `${bucketSec}s@${b.bucketStart.toISOString()}`,
+          ts: b.bucketStart,
+          lat: b.avgLat,
+          lon: b.avgLon,
+          altM: b.avgAltM,
+          speedMS: b.maxSpeedMS,
+          batteryPct: b.minBatteryPct,
+          bucketSec,
+          count: b.count,
+        }));
+      }
+    }
+
+    const ts = {
+      ...(range.start ? { gte: range.start } : {}),
+      ...(range.end ? { lte: range.end } : {}),
+    };
     const rows = await prisma.droneReading.findMany({
-      where: { droneId: id },
+      where: { droneId: id, ...(range.start || range.end ? { ts } : {}) },
       orderBy: { ts: "desc" },
-      take: Number.isFinite(limit) ? Math.max(1, Math.min(limit, 1000)) : 200,
+      take,
       select: {
         id: true,
         ts: true,
@@ -206,8 +285,16 @@ export default async function apiDronesRoutes(app: FastifyInstance, _opts: Fasti
         required: ["id"],
         properties: { id: { type: "string" } },
       },
+      querystring: {
+        type: "object",
+        properties: rangeQueryProperties,
+      },
       response: {
         200: dronePathResponseSchema,
+        400: {
+          type: "object",
+          properties: { error: { type: "string" } },
+        },
         404: {
           type: "object",
           properties: { error: { type: "string" } },
@@ -216,7 +303,11 @@ export default async function apiDronesRoutes(app: FastifyInstance, _opts: Fasti
     },
   }, async (req, reply) => {
     const id = (req.params as any)?.id as string;
-    
+    const range = parseRange(req.query);
+    if (!range) {
+      return reply.status(400).send({ error: "start/end must be valid ISO dates with start <= end" });
+    }
+
     // Check if drone exists
     const drone = await prisma.drone.findUnique({
       where: { id },
@@ -227,9 +318,40 @@ export default async function apiDronesRoutes(app: FastifyInstance, _opts: Fasti
       return reply.status(404).send({ error: "Drone not found" });
     }
 
+    const bucketSec = bucketFor(range, 300);
+    if (bucketSec !== null) {
+      // Most recent 300 buckets, oldest first like the raw path
+      const buckets = await queryRollups({
+        droneIds: [id],
+        source: "READING",
+        bucketSec,
+        ...(range.start ? { start: range.start } : {}),
+        ...(range.end ? { end: range.end } : {}),
+        order: "desc",
+        take: 300,
+      });
+      if (buckets.length) {
+        const path = buckets.reverse().map((b) => ({
+          ts: b.bucketStart,
+          lat: b.avgLat,
+          lon: b.avgLon,
+          altM: b.avgAltM,
+          speedMS: b.maxSpeedMS,
+          headingDeg: null,
+          batteryPct: b.minBatteryPct,
+          count: b.count,
+        }));
+        return { droneId: id, count: path.length, bucketSec, path };
+      }
+    }
+
     // Get most recent 300 path points, then reverse to show oldest first (for path drawing)
+    const ts = {
+      ...(range.start ? { gte: range.start } : {}),
+      ...(range.end ? { lte: range.end } : {}),
+    };
     const rows = await prisma.droneReading.findMany({
-      where: { droneId: id },
+      where: { droneId: id, ...(range.start || range.end ? { ts } : {}) },
       orderBy: { ts: "desc" },
       take: 300,
       select: {
@@ -248,6 +370,7 @@ export default async function apiDronesRoutes(app: FastifyInstance, _opts: Fasti
     return {
       droneId: id,
       count: path.length,
+      bucketSec: null,
       path,
     };
   });
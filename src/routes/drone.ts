@@ -1,7 +1,8 @@
 // src/routes/drone.ts
 import type { FastifyInstance, FastifyPluginOptions } from "fastify";
 import { getLatestDroneDetection, listDetections } from "../services/drone-detections.js";
-import { getDronePaths } from "../services/Drone/path.js";
+import { DEFAULT_PATH_POINTS, getDronePaths } from "../services/Drone/path.js";
+import { RESOLUTIONS, pickBucket, queryRollups, type Resolution } from "../services/rollups.js";
 import { parseDronePathQuery, DronePathValidationError } from "../schemas/drone-path-query.js";
 
 const bboxItemSchema = {
@@ -61,6 +62,9 @@ const detectionHistoryItemSchema = {
       items: bboxItemSchema,
     },
     type: { type: ["string", "null"] },
+    // rollup rows only: bucket size in seconds and detections merged into it
+    bucketSec: { type: "integer" },
+    count: { type: "integer" },
   },
 };
 
@@ -98,6 +102,19 @@ const dronePathQuerySchema = {
       format: "date-time",
       description: "ISO timestamp for the inclusive end of the range.",
     },
+    resolution: {
+      type: "string",
+      enum: [...RESOLUTIONS],
+      default: "auto",
+      description: "Bucket size (1s, 1m, 1h), raw detections, or auto: the smallest bucket that fits the whole range into `points` points.",
+    },
+    points: {
+      type: "integer",
+      minimum: 1,
+      maximum: 10000,
+      default: DEFAULT_PATH_POINTS,
+      description: "Target points per drone for resolution=auto.",
+    },
   },
 };
 
@@ -113,6 +130,7 @@ const dronePathResponseSchema = {
         end: { type: "string", format: "date-time" },
       },
     },
+    bucketSec: { type: ["integer", "null"] },
     drones: {
       type: "array",
       items: {
@@ -132,6 +150,7 @@ const dronePathResponseSchema = {
                 lon: { type: "number" },
                 alt_m: { type: ["number", "null"] },
                 speed_mps: { type: ["number", "null"] },
+                count: { type: "integer" },
               },
             },
           },
@@ -205,6 +224,22 @@ export default async function droneRoutes(app: FastifyInstance, _opts: FastifyPl
             maximum: 1000,
             description: "Maximum number of rows to return (default 100).",
           },
+          start: {
+            type: "string",
+            format: "date-time",
+            description: "Inclusive start of the range.",
+          },
+          end: {
+            type: "string",
+            format: "date-time",
+            description: "Inclusive end of the range (default now).",
+          },
+          resolution: {
+            type: "string",
+            enum: [...RESOLUTIONS],
+            default: "auto",
+            description: "Bucket size (1s, 1m, 1h), raw detections, or auto: the smallest bucket that fits the whole range into `limit` rows. Auto needs a start.",
+          },
         },
       },
       response: {
@@ -213,9 +248,50 @@ export default async function droneRoutes(app: FastifyInstance, _opts: FastifyPl
       },
     },
   }, async (req, reply) => {
-    const { drone_id, limit } = (req.query as any) ?? {};
+    const { drone_id, limit, start: startRaw, end: endRaw, resolution = "auto" } = (req.query as any) ?? {};
     if (!drone_id) return reply.status(400).send({ error: "drone_id required" });
-    const rows = await listDetections(drone_id, Number(limit) || 100);
+    const take = Number(limit) || 100;
+    const start = startRaw ? new Date(startRaw) : undefined;
+    const end = endRaw ? new Date(endRaw) : undefined;
+    if ((start && Number.isNaN(start.getTime())) || (end && Number.isNaN(end.getTime())) || (start && end && start > end)) {
+      return reply.status(400).send({ error: "start/end must be valid ISO dates with start <= end" });
+    }
+
+    const bucketSec = start || resolution !== "auto"
+      ? pickBucket(start ?? new Date(0), end ?? new Date(), take, resolution as Resolution)
+      : null;
+    if (bucketSec !== null) {
+      const buckets = await queryRollups({
+        droneIds: [drone_id],
+        source: "DETECTION",
+        bucketSec,
+        ...(start ? { start } : {}),
+        ...(end ? { end } : {}),
+        order: "desc",
+        take,
+      });
+      // No rollups yet for this range: fall through to raw detections
+      if (buckets.length) {
+        return buckets.map((b) => ({
+          id: `${drone_id}@${bucketSec}s@${b.bucketStart.toISOString()}`,
+          ts: b.bucketStart,
+          lat: b.avgLat, lon: b.avgLon,
+          alt_m: b.avgAltM, speed_mps: b.maxSpeedMS,
+          radius_m: null, angle_deg: null,
+          source_id: null,
+          confidence: null,
+          bbox: [null, null, null, null],
+          type: null,
+          bucketSec,
+          count: b.count,
+        }));
+      }
+    }
+
+    const rows = await listDetections(drone_id, take, {
+      ...(start ? { start } : {}),
+      ...(end ? { end } : {}),
+    });
     return rows.map(r => ({
       id: r.id.toString?.() ?? r.id,
       ts: r.deviceTs,
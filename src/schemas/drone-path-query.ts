@@ -1,11 +1,14 @@
 // src/schemas/drone-path-query.ts
 import { z } from "zod";
-import type { GetDronePathParams } from "../services/Drone/path.js";
+import { DEFAULT_PATH_POINTS, type GetDronePathParams } from "../services/Drone/path.js";
+import { RESOLUTIONS } from "../services/rollups.js";
 
 const baseSchema = z.object({
   drone_ids: z.string().min(1, "drone_ids is required"),
   start: z.string().min(1, "start is required"),
   end: z.string().min(1, "end is required"),
+  resolution: z.enum(RESOLUTIONS).default("auto"),
+  points: z.coerce.number().int().min(1).max(10000).default(DEFAULT_PATH_POINTS),
 });
 
 export class DronePathValidationError extends Error {
@@ -44,5 +47,5 @@ export function parseDronePathQuery(query: unknown): GetDronePathParams {
     throw new DronePathValidationError("start must be earlier than end");
   }
 
-  return { droneIds, start, end };
+  return { droneIds, start, end, resolution: parsed.data.resolution, points: parsed.data.points };
 }
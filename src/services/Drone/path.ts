@@ -1,5 +1,6 @@
 // src/services/Drone/path.ts
 import { prisma } from "../../db/prisma.js";
+import { pickBucket, queryRollups, type Resolution } from "../rollups.js";
 
 export interface DronePathPoint {
   id: string;
@@ -8,6 +9,8 @@ export interface DronePathPoint {
   lon: number;
   alt_m: number | null;
   speed_mps: number | null;
+  // only on rollup points: samples merged into this bucket
+  count?: number;
 }
 
 export interface DronePath {
@@ -19,18 +22,27 @@ export interface GetDronePathParams {
   droneIds: string[];
   start: Date;
   end: Date;
+  resolution?: Resolution;
+  // per-drone point budget used by resolution=auto
+  points?: number;
 }
 
 export interface DronePathResult {
   range: { start: string; end: string };
+  // bucket size of the points in seconds, null for raw detections; drones
+  // without rollups in the range still get raw points (without `count`)
+  bucketSec: number | null;
   drones: DronePath[];
 }
 
+export const DEFAULT_PATH_POINTS = 1000;
+
 export async function getDronePaths(params: GetDronePathParams): Promise<DronePathResult> {
   const uniqueDroneIds = Array.from(new Set(params.droneIds.filter(Boolean)));
   if (!uniqueDroneIds.length) {
     return {
       range: { start: params.start.toISOString(), end: params.end.toISOString() },
+      bucketSec: null,
       drones: [],
     };
   }
@@ -38,9 +50,52 @@ export async function getDronePaths(params: GetDronePathParams): Promise<DronePa
     throw new Error("start must be earlier than end");
   }
 
+  const budget = params.points ?? DEFAULT_PATH_POINTS;
+  const bucketSec = pickBucket(params.start, params.end, budget, params.resolution);
+  const grouped = new Map<string, DronePathPoint[]>();
+  let rawDroneIds = uniqueDroneIds;
+
+  if (bucketSec !== null) {
+    const buckets = await queryRollups({
+      droneIds: uniqueDroneIds,
+      source: "DETECTION",
+      bucketSec,
+      start: params.start,
+      end: params.end,
+    });
+    for (const b of buckets) {
+      const points = grouped.get(b.droneId) ?? [];
+      points.push({
+        id: `${b.droneId}@${bucketSec}s@${b.bucketStart.toISOString()}`,
+        ts: b.bucketStart.toISOString(),
+        lat: b.avgLat,
+        lon: b.avgLon,
+        alt_m: b.avgAltM,
+        speed_mps: b.maxSpeedMS,
+        count: b.count,
+      });
+      grouped.set(b.droneId, points);
+    }
+    // Ranges longer than `budget` hours overflow even 1h buckets: keep the newest points
+    for (const [droneId, points] of grouped) {
+      if (points.length > budget) grouped.set(droneId, points.slice(-budget));
+    }
+    // Drones without rollups in the range (not backfilled yet) get raw detections
+    rawDroneIds = uniqueDroneIds.filter((droneId) => !grouped.has(droneId));
+  }
+  const rollupsUsed = grouped.size > 0;
+
+  if (!rawDroneIds.length) {
+    return {
+      range: { start: params.start.toISOString(), end: params.end.toISOString() },
+      bucketSec,
+      drones: uniqueDroneIds.map((droneId) => ({ droneId, points: grouped.get(droneId) ?? [] })),
+    };
+  }
+
   const rows = await prisma.droneDetection.findMany({
     where: {
-      droneId: { in: uniqueDroneIds },
+      droneId: { in: rawDroneIds },
       deviceTs: {
         gte: params.start,
         lte: params.end,
@@ -61,7 +116,6 @@ export async function getDronePaths(params: GetDronePathParams): Promise<DronePa
     },
   });
 
-  const grouped = new Map<string, DronePathPoint[]>();
   for (const row of rows) {
     const points = grouped.get(row.droneId) ?? [];
     points.push({
@@ -82,6 +136,7 @@ export async function getDronePaths(params: GetDronePathParams): Promise<DronePa
 
   return {
     range: { start: params.start.toISOString(), end: params.end.toISOString() },
+    bucketSec: rollupsUsed ? bucketSec : null,
     drones,
   };
 }
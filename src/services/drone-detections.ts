@@ -1,25 +1,74 @@
 // src/services/drone-detections.ts
+import type { Prisma } from "@prisma/client";
 import { prisma } from "../db/prisma.js";
 import type { DroneDetection } from "../schemas/drone-detection.js";
+import type { FramePayload } from "../schemas/frame.js";
+import { recordRollup, type RollupSample } from "./rollups.js";
 
-export async function saveDroneDetection(d: DroneDetection, rawId?: bigint) {
+export type DetectionRow = Prisma.DroneDetectionCreateManyInput;
+
+// row for a legacy drones/detections message (live ingest and reprocessing)
+export function detectionRow(d: DroneDetection, rawId?: bigint | null): DetectionRow {
+  return {
+    deviceTs: d.timestamp,
+    droneId: d.drone_id,
+    latDeg: d.latitude,
+    lonDeg: d.longitude,
+    altM: d.altitude_m,
+    speedMps: d.speed_mps,
+    radiusM: d.radius_m ?? null,
+    angleDeg: d.angle_deg ?? null,
+    rawId: rawId ?? null,
+  };
+}
+
+// one row per object of a drones/frames message, in frame.objects order
+export function frameDetectionRows(frame: FramePayload, frameId: bigint | null, rawId?: bigint | null): DetectionRow[] {
+  return frame.objects.map((obj) => ({
+    deviceTs: obj.timestamp ?? frame.timestamp,
+    droneId: obj.drone_id,
+    latDeg: obj.lat,
+    lonDeg: obj.lon,
+    altM: obj.alt_m,
+    speedMps: obj.speed_mps,
+    sourceId: frame.source_id,
+    type: typeof obj.type === "string" ? obj.type : null,
+    confidence: typeof obj.confidence === "number" ? obj.confidence : null,
+    bboxX: obj.bbox[0],
+    bboxY: obj.bbox[1],
+    bboxW: obj.bbox[2],
+    bboxH: obj.bbox[3],
+    frameId,
+    rawId: rawId ?? null,
+  }));
+}
+
+export function detectionRollupSample(row: DetectionRow): RollupSample {
+  return {
+    droneId: row.droneId,
+    source: "DETECTION",
+    ts: new Date(row.deviceTs),
+    lat: row.latDeg,
+    lon: row.lonDeg,
+    altM: row.altM,
+    speedMS: row.speedMps,
+  };
+}
+
+// insert one detection row and update its rollups
+export async function saveDetectionRow(row: DetectionRow) {
   const rec = await (prisma as any).droneDetection.create({
-    data: {
-      deviceTs: d.timestamp,
-      droneId: d.drone_id,
-      latDeg: d.latitude,
-      lonDeg: d.longitude,
-      altM: d.altitude_m,
-      speedMps: d.speed_mps,
-      radiusM: d.radius_m ?? null,
-      angleDeg: d.angle_deg ?? null,
-      rawId: rawId ?? null,
-    },
+    data: row,
     select: { id: true }
   });
+  await recordRollup(detectionRollupSample(row));
   return rec.id;
 }
 
+export async function saveDroneDetection(d: DroneDetection, rawId?: bigint) {
+  return saveDetectionRow(detectionRow(d, rawId));
+}
+
 // save one detection that came from a frame (new format)
 // A2 note: this uses new fields like bbox, confidence
 export async function saveDroneDetectionFromFrame(obj: {
@@ -36,27 +85,23 @@ export async function saveDroneDetectionFromFrame(obj: {
   frameId?: bigint;
   rawId?: bigint;
 }) {
-  const rec = await (prisma as any).droneDetection.create({
-    data: {
-      deviceTs: obj.deviceTs,
-      droneId: obj.droneId,
-      latDeg: obj.lat,
-      lonDeg: obj.lon,
-      altM: obj.altM,
-      speedMps: obj.speedMps,
-      sourceId: obj.sourceId,
-      type: obj.type ?? null,
-      confidence: obj.confidence ?? null,
-      bboxX: obj.bbox ? obj.bbox[0] : null,
-      bboxY: obj.bbox ? obj.bbox[1] : null,
-      bboxW: obj.bbox ? obj.bbox[2] : null,
-      bboxH: obj.bbox ? obj.bbox[3] : null,
-      frameId: obj.frameId ?? null,
-      rawId: obj.rawId ?? null,
-    },
-    select: { id: true }
+  return saveDetectionRow({
+    deviceTs: obj.deviceTs,
+    droneId: obj.droneId,
+    latDeg: obj.lat,
+    lonDeg: obj.lon,
+    altM: obj.altM,
+    speedMps: obj.speedMps,
+    sourceId: obj.sourceId,
+    type: obj.type ?? null,
+    confidence: obj.confidence ?? null,
+    bboxX: obj.bbox ? obj.bbox[0] : null,
+    bboxY: obj.bbox ? obj.bbox[1] : null,
+    bboxW: obj.bbox ? obj.bbox[2] : null,
+    bboxH: obj.bbox ? obj.bbox[3] : null,
+    frameId: obj.frameId ?? null,
+    rawId: obj.rawId ?? null,
   });
-  return rec.id;
 }
 
 export function getLatestDroneDetection(droneId?: string) {
@@ -66,9 +111,13 @@ export function getLatestDroneDetection(droneId?: string) {
   });
 }
 
-export function listDetections(droneId: string, limit = 100) {
+export function listDetections(droneId: string, limit = 100, range: { start?: Date; end?: Date } = {}) {
+  const deviceTs = {
+    ...(range.start ? { gte: range.start } : {}),
+    ...(range.end ? { lte: range.end } : {}),
+  };
   return prisma.droneDetection.findMany({
-    where: { droneId },
+    where: { droneId, ...(range.start || range.end ? { deviceTs } : {}) },
     orderBy: { deviceTs: "desc" },
     take: limit,
   });
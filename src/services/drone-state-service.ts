@@ -1,6 +1,7 @@
 // src/services/drone-state-service.ts
 import { prisma } from "../db/prisma.js";
 import type { DroneState } from "../schemas/drone-state.js";
+import { recordRollup } from "./rollups.js";
 
 type PersistedDroneState = Omit<DroneState, "kind">;
 
@@ -78,6 +79,17 @@ export async function upsertDroneAndInsertReading(
     select: { id: true },
   });
 
+  await recordRollup({
+    droneId: state.droneId,
+    source: "READING",
+    ts,
+    lat: state.lat,
+    lon: state.lon,
+    altM: normalized.alt_m,
+    speedMS: normalized.speed_m_s,
+    batteryPct: normalized.battery_pct,
+  });
+
   // Return normalized payload for WS broadcast
   return {
     droneId: state.droneId,
@@ -0,0 +1,339 @@
+// src/services/reprocess.ts
+// Bulk replay of stored RawMessage rows (after a schema or parser fix).
+// A job walks the matching rows by id, validates them like src/mqtt/ingest.ts
+// and writes each batch with bulk inserts. A checkpoint in ReprocessJob makes
+// the job resumable.
+import type { Prisma, ReprocessJob } from "@prisma/client";
+import { prisma } from "../db/prisma.js";
+import { TOPIC_DRONE, TOPIC_FRAME } from "../mqtt/topics.js";
+import { droneDetectionSchema } from "../schemas/drone-detection.js";
+import { frameSchema, type FramePayload } from "../schemas/frame.js";
+import { detectionRollupSample, detectionRow, frameDetectionRows, type DetectionRow } from "./drone-detections.js";
+import { recordRollups } from "./rollups.js";
+
+export const REPROCESS_DEFAULT_BATCH = 500;
+export const REPROCESS_MAX_BATCH = 5000;
+export const REPROCESS_DEFAULT_CONCURRENCY = 4;
+// Every in-flight batch holds a pooled connection for its transaction; keep
+// part of Prisma's pool (num_cpus * 2 + 1 by default) for the live ingest
+export const REPROCESS_MAX_CONCURRENCY = Number(process.env.REPROCESS_MAX_CONCURRENCY) || 4;
+
+// Interactive transaction limits for one batch. Prisma's defaults (5 s to run,
+// 2 s to get a connection) are too short for thousands of rows or for waiting
+// behind the other in-flight batches.
+function batchTransactionOptions(batchSize: number) {
+  return { timeout: 10_000 + batchSize * 20, maxWait: 10_000 };
+}
+
+export interface ReprocessFilter {
+  topic?: string;
+  receivedFrom?: Date;
+  receivedTo?: Date;
+  parseOk?: boolean;
+  // case-insensitive substring of RawMessage.error
+  errorPattern?: string;
+}
+
+export interface CreateReprocessJobParams extends ReprocessFilter {
+  batchSize?: number;
+  concurrency?: number;
+}
+
+interface BatchResult {
+  scanned: number;
+  succeeded: number;
+  failed: number;
+  frames: number;
+  detections: number;
+}
+
+interface InFlightBatch {
+  lastId: bigint;
+  done: boolean;
+  result?: BatchResult;
+  error?: unknown;
+  promise: Promise<void>;
+}
+
+// Jobs running in this process; stop asks the loop to pause after its in-flight batches
+const running = new Map<string, { stop: boolean }>();
+
+function rawFilter(job: ReprocessJob, afterId: bigint): Prisma.RawMessageWhereInput {
+  const receivedAt = {
+    ...(job.receivedFrom ? { gte: job.receivedFrom } : {}),
+    ...(job.receivedTo ? { lte: job.receivedTo } : {}),
+  };
+  return {
+    id: { gt: afterId },
+    parseOk: job.parseOk,
+    ...(job.topic ? { topic: job.topic } : {}),
+    ...(job.receivedFrom || job.receivedTo ? { receivedAt } : {}),
+    // ingest also stores a parseOk=false row before parsing; only rows with an error failed
+    ...(job.errorPattern
+      ? { error: { contains: job.errorPattern, mode: "insensitive" as const } }
+      : job.parseOk ? {} : { error: { not: null } }),
+  };
+}
+
+export async function createReprocessJob(params: CreateReprocessJobParams) {
+  const job = await prisma.reprocessJob.create({
+    data: {
+      topic: params.topic ?? null,
+      receivedFrom: params.receivedFrom ?? null,
+      receivedTo: params.receivedTo ?? null,
+      parseOk: params.parseOk ?? false,
+      errorPattern: params.errorPattern ?? null,
+      batchSize: Math.min(params.batchSize ?? REPROCESS_DEFAULT_BATCH, REPROCESS_MAX_BATCH),
+      concurrency: Math.min(params.concurrency ?? REPROCESS_DEFAULT_CONCURRENCY, REPROCESS_MAX_CONCURRENCY),
+    },
+  });
+  const total = await prisma.rawMessage.count({ where: rawFilter(job, 0n) });
+  return prisma.reprocessJob.update({ where: { id: job.id }, data: { total } });
+}
+
+export function getReprocessJob(id: bigint) {
+  return prisma.reprocessJob.findUnique({ where: { id } });
+}
+
+export function listReprocessJobs(limit = 50) {
+  return prisma.reprocessJob.findMany({ orderBy: { id: "desc" }, take: limit });
+}
+
+export function isReprocessJobRunning(id: bigint) {
+  return running.has(id.toString());
+}
+
+// Pause requested, in-flight batches still finishing
+export function isReprocessJobPausing(id: bigint) {
+  return running.get(id.toString())?.stop ?? false;
+}
+
+export function pauseReprocessJob(id: bigint) {
+  const ctl = running.get(id.toString());
+  if (!ctl) return false;
+  ctl.stop = true;
+  return true;
+}
+
+/** Start (or resume from its checkpoint) a job in the background. */
+export function startReprocessJob(id: bigint) {
+  if (running.has(id.toString())) return false;
+  const ctl = { stop: false };
+  running.set(id.toString(), ctl);
+  runJob(id, ctl)
+    .catch((e: any) => console.error("❌ Reprocess job crashed", { id: id.toString(), error: e?.message ?? e }))
+    .finally(() => running.delete(id.toString()));
+  return true;
+}
+
+async function runJob(id: bigint, ctl: { stop: boolean }) {
+  let job = await prisma.reprocessJob.update({
+    where: { id },
+    data: { status: "RUNNING", lastError: null, finishedAt: null },
+  });
+  if (!job.startedAt) {
+    job = await prisma.reprocessJob.update({ where: { id }, data: { startedAt: new Date() } });
+  }
+
+  const inFlight: InFlightBatch[] = [];
+  let readCursor = job.cursorId;
+  // Jobs stored before a lower limit was configured
+  const batchSize = Math.min(job.batchSize, REPROCESS_MAX_BATCH);
+  const concurrency = Math.min(job.concurrency, REPROCESS_MAX_CONCURRENCY);
+  let activeSince = Date.now();
+
+  // Advance the checkpoint past every finished batch at the head, so cursorId
+  // never skips a batch that is still being written
+  const checkpoint = async () => {
+    const totals: BatchResult = { scanned: 0, succeeded: 0, failed: 0, frames: 0, detections: 0 };
+    let cursorId: bigint | undefined;
+    while (inFlight.length && inFlight[0]!.done) {
+      const head = inFlight.shift()!;
+      if (head.error) throw head.error;
+      const r = head.result!;
+      totals.scanned += r.scanned;
+      totals.succeeded += r.succeeded;
+      totals.failed += r.failed;
+      totals.frames += r.frames;
+      totals.detections += r.detections;
+      cursorId = head.lastId;
+    }
+    const now = Date.now();
+    const activeMs = now - activeSince;
+    activeSince = now;
+    job = await prisma.reprocessJob.update({
+      where: { id },
+      data: {
+        ...(cursorId !== undefined ? { cursorId } : {}),
+        scanned: { increment: totals.scanned },
+        succeeded: { increment: totals.succeeded },
+        failed: { increment: totals.failed },
+        frames: { increment: totals.frames },
+        detections: { increment: totals.detections },
+        activeMs: { increment: activeMs },
+      },
+    });
+  };
+
+  try {
+    while (!ctl.stop) {
+      const rows = await prisma.rawMessage.findMany({
+        where: rawFilter(job, readCursor),
+        orderBy: { id: "asc" },
+        take: batchSize,
+        select: { id: true, topic: true, payload: true },
+      });
+      if (!rows.length) break;
+      readCursor = rows[rows.length - 1]!.id;
+
+      const entry: InFlightBatch = { lastId: readCursor, done: false, promise: Promise.resolve() };
+      entry.promise = processBatch(rows).then(
+        (result) => { entry.result = result; entry.done = true; },
+        (error) => { entry.error = error; entry.done = true; },
+      );
+      inFlight.push(entry);
+
+      if (inFlight.length >= concurrency) {
+        await Promise.race(inFlight.filter((e) => !e.done).map((e) => e.promise));
+      }
+      await checkpoint();
+    }
+    await Promise.all(inFlight.map((e) => e.promise));
+    await checkpoint();
+
+    await prisma.reprocessJob.update({
+      where: { id },
+      data: ctl.stop ? { status: "PAUSED" } : { status: "DONE", finishedAt: new Date() },
+    });
+    console.log(`🔁 Reprocess job ${id} ${ctl.stop ? "paused" : "done"}`, {
+      scanned: job.scanned, succeeded: job.succeeded, failed: job.failed,
+    });
+  } catch (e: any) {
+    // Let the other batches settle so a resume starts from a consistent checkpoint
+    await Promise.all(inFlight.map((b) => b.promise));
+    await prisma.reprocessJob.update({
+      where: { id },
+      data: { status: "FAILED", lastError: e?.message ?? String(e) },
+    });
+    throw e;
+  }
+}
+
+/**
+ * Validate one batch like the MQTT ingest and write it in a transaction:
+ * frames, then their detections, then the parse result on the raw rows.
+ * A batch is all-or-nothing, so a crash never leaves half-written rows and
+ * a resumed job skips batches whose raw rows are already parseOk.
+ */
+async function processBatch(rows: { id: bigint; topic: string; payload: string }[]): Promise<BatchResult> {
+  const okIds: bigint[] = [];
+  const failures = new Map<string, bigint[]>();
+  const legacy: DetectionRow[] = [];
+  const frames: { rawId: bigint; frame: FramePayload }[] = [];
+
+  for (const row of rows) {
+    try {
+      const json = JSON.parse(row.payload);
+      if (row.topic === TOPIC_DRONE) {
+        const d = droneDetectionSchema.parse(json);
+        legacy.push(detectionRow(d, row.id));
+      } else if (row.topic === TOPIC_FRAME) {
+        frames.push({ rawId: row.id, frame: frameSchema.parse(json) });
+      } else {
+        throw new Error(`unknown topic ${row.topic}`);
+      }
+      okIds.push(row.id);
+    } catch (e: any) {
+      const message = e?.message ?? String(e);
+      const ids = failures.get(message) ?? [];
+      ids.push(row.id);
+      failures.set(message, ids);
+    }
+  }
+
+  const detections = await prisma.$transaction(async (tx) => {
+    const fromFrames: DetectionRow[] = [];
+    if (frames.length) {
+      const created = await tx.frame.createManyAndReturn({
+        data: frames.map(({ frame }) => ({
+          frameNo: frame.frame_id,
+          deviceTs: frame.timestamp,
+          sourceId: frame.source_id,
+          objectsCount: frame.objects.length,
+          imageBase64: frame.image_base64 ?? null,
+        })),
+        select: { id: true, frameNo: true, deviceTs: true, sourceId: true },
+      });
+      // Match the returned ids back by content rather than relying on RETURNING order
+      const ids = new Map<string, bigint[]>();
+      for (const f of created) {
+        const key = `${f.sourceId}|${f.frameNo}|${f.deviceTs.getTime()}`;
+        ids.set(key, [...(ids.get(key) ?? []), f.id]);
+      }
+      for (const { rawId, frame } of frames) {
+        const frameId = ids.get(`${frame.source_id}|${frame.frame_id}|${frame.timestamp.getTime()}`)?.shift() ?? null;
+        fromFrames.push(...frameDetectionRows(frame, frameId, rawId));
+      }
+    }
+
+    const all = [...legacy, ...fromFrames];
+    if (all.length) await tx.droneDetection.createMany({ data: all });
+    if (okIds.length) {
+      await tx.rawMessage.updateMany({ where: { id: { in: okIds } }, data: { parseOk: true, error: null } });
+    }
+    for (const [error, ids] of failures) {
+      await tx.rawMessage.updateMany({ where: { id: { in: ids } }, data: { error } });
+    }
+    return all;
+  }, batchTransactionOptions(rows.length));
+
+  await recordRollups(detections.map(detectionRollupSample));
+
+  let failed = 0;
+  for (const ids of failures.values()) failed += ids.length;
+  return {
+    scanned: rows.length,
+    succeeded: okIds.length,
+    failed,
+    frames: frames.length,
+    detections: detections.length,
+  };
+}
+
+/** JSON view of a job with progress and throughput; PAUSING until a requested pause is stored. */
+export function describeReprocessJob(job: ReprocessJob) {
+  const activeS = job.activeMs / 1000;
+  const rowsPerSec = activeS > 0 ? job.scanned / activeS : 0;
+  const remaining = Math.max(0, job.total - job.scanned);
+  const status = job.status === "RUNNING" && isReprocessJobPausing(job.id) ? "PAUSING" : job.status;
+  return {
+    id: job.id.toString(),
+    status,
+    running: isReprocessJobRunning(job.id),
+    filter: {
+      topic: job.topic,
+      receivedFrom: job.receivedFrom,
+      receivedTo: job.receivedTo,
+      parseOk: job.parseOk,
+      errorPattern: job.errorPattern,
+    },
+    batchSize: job.batchSize,
+    concurrency: job.concurrency,
+    cursorId: job.cursorId.toString(),
+    total: job.total,
+    scanned: job.scanned,
+    succeeded: job.succeeded,
+    failed: job.failed,
+    frames: job.frames,
+    detections: job.detections,
+    progress: job.total > 0 ? Math.min(1, job.scanned / job.total) : job.status === "DONE" ? 1 : 0,
+    rowsPerSec: Math.round(rowsPerSec * 10) / 10,
+    etaSeconds: status === "RUNNING" && rowsPerSec > 0 ? Math.round(remaining / rowsPerSec) : null,
+    activeSeconds: Math.round(activeS),
+    lastError: job.lastError,
+    createdAt: job.createdAt,
+    startedAt: job.startedAt,
+    finishedAt: job.finishedAt,
+    updatedAt: job.updatedAt,
+  };
+}
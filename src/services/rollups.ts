@@ -0,0 +1,265 @@
+// src/services/rollups.ts
+// Per-drone time buckets (1s / 1m / 1h) kept next to the raw rows so history
+// queries over long ranges read one row per bucket instead of every sample.
+import { Prisma } from "@prisma/client";
+import { prisma } from "../db/prisma.js";
+
+export const ROLLUP_BUCKETS = [1, 60, 3600] as const;
+export type RollupBucket = (typeof ROLLUP_BUCKETS)[number];
+export type RollupSource = "READING" | "DETECTION";
+
+// "auto" picks a bucket from the range and point budget, "raw" skips rollups
+export const RESOLUTIONS = ["auto", "raw", "1s", "1m", "1h"] as const;
+export type Resolution = (typeof RESOLUTIONS)[number];
+
+const ROLLUPS_ENABLED = process.env.ROLLUPS_ENABLED !== "false";
+
+// 18 bind parameters per bucket row
+const UPSERT_CHUNK = 2000;
+
+const RESOLUTION_SECONDS: Record<"1s" | "1m" | "1h", RollupBucket> = { "1s": 1, "1m": 60, "1h": 3600 };
+
+export interface RollupSample {
+  droneId: string;
+  source: RollupSource;
+  ts: Date;
+  lat: number;
+  lon: number;
+  altM?: number | null;
+  speedMS?: number | null;
+  batteryPct?: number | null;
+}
+
+export interface RollupRow {
+  droneId: string;
+  bucketSec: number;
+  bucketStart: Date;
+  count: number;
+  firstTs: Date;
+  firstLat: number;
+  firstLon: number;
+  lastTs: Date;
+  lastLat: number;
+  lastLon: number;
+  avgLat: number;
+  avgLon: number;
+  avgAltM: number | null;
+  maxSpeedMS: number | null;
+  minBatteryPct: number | null;
+}
+
+function bucketStart(ts: Date, bucketSec: number) {
+  const ms = bucketSec * 1000;
+  return new Date(Math.floor(ts.getTime() / ms) * ms);
+}
+
+/**
+ * Bucket size in seconds to answer a query, or null to read raw rows.
+ * "auto" takes the smallest bucket that fits the whole range into `points`
+ * rows, i.e. at least (end - start) / points seconds wide (the coarsest one
+ * when even that is too fine, callers truncate). Ranges with fewer seconds
+ * than points stay raw.
+ */
+export function pickBucket(start: Date, end: Date, points: number, resolution: Resolution = "auto"): RollupBucket | null {
+  if (!ROLLUPS_ENABLED || resolution === "raw") return null;
+  if (resolution !== "auto") return RESOLUTION_SECONDS[resolution];
+  const stepSec = (end.getTime() - start.getTime()) / 1000 / Math.max(1, points);
+  if (stepSec < 1) return null;
+  return ROLLUP_BUCKETS.find((bucket) => bucket >= stepSec) ?? ROLLUP_BUCKETS[ROLLUP_BUCKETS.length - 1]!;
+}
+
+interface PendingBucket {
+  droneId: string;
+  source: RollupSource;
+  bucketSec: number;
+  bucketStart: Date;
+  count: number;
+  first: RollupSample;
+  last: RollupSample;
+  sumLat: number;
+  sumLon: number;
+  sumAltM: number;
+  altCount: number;
+  maxSpeedMS: number | null;
+  minBatteryPct: number | null;
+}
+
+// Merge samples that share a bucket first: one INSERT cannot touch the same row twice
+function aggregate(samples: RollupSample[]) {
+  const buckets = new Map<string, PendingBucket>();
+  for (const sample of samples) {
+    for (const bucketSec of ROLLUP_BUCKETS) {
+      const start = bucketStart(sample.ts, bucketSec);
+      const key = `${sample.source}|${sample.droneId}|${bucketSec}|${start.getTime()}`;
+      let b = buckets.get(key);
+      if (!b) {
+        b = {
+          droneId: sample.droneId, source: sample.source, bucketSec, bucketStart: start, count: 0,
+          first: sample, last: sample, sumLat: 0, sumLon: 0, sumAltM: 0, altCount: 0,
+          maxSpeedMS: null, minBatteryPct: null,
+        };
+        buckets.set(key, b);
+      }
+      b.count += 1;
+      if (sample.ts < b.first.ts) b.first = sample;
+      if (sample.ts >= b.last.ts) b.last = sample;
+      b.sumLat += sample.lat;
+      b.sumLon += sample.lon;
+      if (sample.altM != null) {
+        b.sumAltM += sample.altM;
+        b.altCount += 1;
+      }
+      if (sample.speedMS != null) b.maxSpeedMS = Math.max(b.maxSpeedMS ?? sample.speedMS, sample.speedMS);
+      if (sample.batteryPct != null) b.minBatteryPct = Math.min(b.minBatteryPct ?? sample.batteryPct, sample.batteryPct);
+    }
+  }
+  // Stable row order so concurrent batches lock shared buckets in the same order
+  return [...buckets.entries()].sort(([a], [b]) => (a < b ? -1 : a > b ? 1 : 0)).map(([, b]) => b);
+}
+
+/**
+ * Fold samples into their 1s/1m/1h buckets with batched upserts. Order-independent:
+ * first/last are decided by timestamp, so late or replayed samples land correctly.
+ */
+export async function recordRollups(samples: RollupSample[]) {
+  if (!ROLLUPS_ENABLED || !samples.length) return;
+  const buckets = aggregate(samples);
+  try {
+    // Chunked to stay well below Postgres' 65535 bind parameters per statement
+    for (let i = 0; i < buckets.length; i += UPSERT_CHUNK) {
+      const rows = buckets.slice(i, i + UPSERT_CHUNK).map((b) => Prisma.sql`(
+        ${b.droneId}, ${b.source}::"RollupSource", ${b.bucketSec}, ${b.bucketStart}, ${b.count},
+        ${b.first.ts}, ${b.first.lat}, ${b.first.lon}, ${b.last.ts}, ${b.last.lat}, ${b.last.lon},
+        ${b.last.altM ?? null}::double precision,
+        ${b.sumLat}, ${b.sumLon}, ${b.sumAltM}, ${b.altCount},
+        ${b.maxSpeedMS}::double precision, ${b.minBatteryPct}::double precision, NOW()
+      )`);
+      await prisma.$executeRaw`
+        INSERT INTO "DroneRollup" (
+          "droneId", "source", "bucketSec", "bucketStart", "count",
+          "firstTs", "firstLat", "firstLon", "lastTs", "lastLat", "lastLon", "lastAltM",
+          "sumLat", "sumLon", "sumAltM", "altCount",
+          "maxSpeedMS", "minBatteryPct", "updatedAt"
+        )
+        VALUES ${Prisma.join(rows)}
+        ON CONFLICT ("droneId", "source", "bucketSec", "bucketStart") DO UPDATE SET
+          "count" = "DroneRollup"."count" + EXCLUDED."count",
+          "firstTs" = LEAST("DroneRollup"."firstTs", EXCLUDED."firstTs"),
+          "firstLat" = CASE WHEN EXCLUDED."firstTs" < "DroneRollup"."firstTs" THEN EXCLUDED."firstLat" ELSE "DroneRollup"."firstLat" END,
+          "firstLon" = CASE WHEN EXCLUDED."firstTs" < "DroneRollup"."firstTs" THEN EXCLUDED."firstLon" ELSE "DroneRollup"."firstLon" END,
+          "lastTs" = GREATEST("DroneRollup"."lastTs", EXCLUDED."lastTs"),
+          "lastLat" = CASE WHEN EXCLUDED."lastTs" >= "DroneRollup"."lastTs" THEN EXCLUDED."lastLat" ELSE "DroneRollup"."lastLat" END,
+          "lastLon" = CASE WHEN EXCLUDED."lastTs" >= "DroneRollup"."lastTs" THEN EXCLUDED."lastLon" ELSE "DroneRollup"."lastLon" END,
+          "lastAltM" = CASE WHEN EXCLUDED."lastTs" >= "DroneRollup"."lastTs" THEN EXCLUDED."lastAltM" ELSE "DroneRollup"."lastAltM" END,
+          "sumLat" = "DroneRollup"."sumLat" + EXCLUDED."sumLat",
+          "sumLon" = "DroneRollup"."sumLon" + EXCLUDED."sumLon",
+          "sumAltM" = "DroneRollup"."sumAltM" + EXCLUDED."sumAltM",
+          "altCount" = "DroneRollup"."altCount" + EXCLUDED."altCount",
+          "maxSpeedMS" = GREATEST("DroneRollup"."maxSpeedMS", EXCLUDED."maxSpeedMS"),
+          "minBatteryPct" = LEAST("DroneRollup"."minBatteryPct", EXCLUDED."minBatteryPct"),
+          "updatedAt" = NOW()
+      `;
+    }
+  } catch (e: any) {
+    // Rollups are derived data (rebuildRollups can backfill); never fail ingest for them
+    console.warn("⚠️ rollup update failed", { samples: samples.length, error: e?.message });
+  }
+}
+
+export function recordRollup(sample: RollupSample) {
+  return recordRollups([sample]);
+}
+
+export interface QueryRollupsParams {
+  droneIds: string[];
+  source: RollupSource;
+  bucketSec: RollupBucket;
+  start?: Date;
+  end?: Date;
+  order?: "asc" | "desc";
+  take?: number;
+}
+
+export async function queryRollups(params: QueryRollupsParams): Promise<RollupRow[]> {
+  const order = params.order === "desc" ? Prisma.sql`DESC` : Prisma.sql`ASC`;
+  const conditions = [
+    Prisma.sql`"droneId" IN (${Prisma.join(params.droneIds)})`,
+    Prisma.sql`"source" = ${params.source}::"RollupSource"`,
+    Prisma.sql`"bucketSec" = ${params.bucketSec}`,
+  ];
+  // A bucket belongs to the range if any part of it overlaps
+  if (params.start) conditions.push(Prisma.sql`"bucketStart" > ${new Date(params.start.getTime() - params.bucketSec * 1000)}`);
+  if (params.end) conditions.push(Prisma.sql`"bucketStart" <= ${params.end}`);
+  const limit = params.take ? Prisma.sql`LIMIT ${params.take}` : Prisma.empty;
+
+  return prisma.$queryRaw<RollupRow[]>`
+    SELECT "droneId", "bucketSec", "bucketStart", "count",
+      "firstTs", "firstLat", "firstLon", "lastTs", "lastLat", "lastLon",
+      "sumLat" / "count" AS "avgLat",
+      "sumLon" / "count" AS "avgLon",
+      CASE WHEN "altCount" > 0 THEN "sumAltM" / "altCount" END AS "avgAltM",
+      "maxSpeedMS", "minBatteryPct"
+    FROM "DroneRollup"
+    WHERE ${Prisma.join(conditions, " AND ")}
+    ORDER BY "droneId" ASC, "bucketStart" ${order}
+    ${limit}
+  `;
+}
+
+/**
+ * Recompute the buckets of a time range from the raw rows (backfill after
+ * enabling rollups, or repair after failed incremental updates).
+ * Returns the number of bucket rows written.
+ */
+export async function rebuildRollups(params: { source: RollupSource; start: Date; end: Date; droneId?: string }) {
+  const droneFilter = params.droneId ? Prisma.sql`AND "droneId" = ${params.droneId}` : Prisma.empty;
+
+  let written = 0;
+  for (const bucketSec of ROLLUP_BUCKETS) {
+    // Whole buckets only, so a partial range never overwrites a bucket with part of its samples
+    const from = bucketStart(params.start, bucketSec);
+    const to = new Date(bucketStart(params.end, bucketSec).getTime() + bucketSec * 1000);
+    // Samples of one source in a common shape: droneId, ts, lat, lon, alt, speed, battery
+    const rangeSamples = params.source === "READING"
+      ? Prisma.sql`
+          SELECT "droneId", "ts", "lat", "lon", "altM" AS "alt", "speedMS" AS "speed", "batteryPct" AS "battery"
+          FROM "DroneReading"
+          WHERE "ts" >= ${from} AND "ts" < ${to} ${droneFilter}`
+      : Prisma.sql`
+          SELECT "droneId", "deviceTs" AS "ts", "latDeg" AS "lat", "lonDeg" AS "lon", "altM" AS "alt",
+            "speedMps" AS "speed", NULL::double precision AS "battery"
+          FROM "DroneDetection"
+          WHERE "deviceTs" >= ${from} AND "deviceTs" < ${to} ${droneFilter}`;
+    written += await prisma.$executeRaw`
+      INSERT INTO "DroneRollup" (
+        "droneId", "source", "bucketSec", "bucketStart", "count",
+        "firstTs", "firstLat", "firstLon", "lastTs", "lastLat", "lastLon", "lastAltM",
+        "sumLat", "sumLon", "sumAltM", "altCount",
+        "maxSpeedMS", "minBatteryPct", "updatedAt"
+      )
+      SELECT "droneId", ${params.source}::"RollupSource", ${bucketSec}, "bucket", COUNT(*)::int,
+        MIN("ts"),
+        (ARRAY_AGG("lat" ORDER BY "ts" ASC))[1], (ARRAY_AGG("lon" ORDER BY "ts" ASC))[1],
+        MAX("ts"),
+        (ARRAY_AGG("lat" ORDER BY "ts" DESC))[1], (ARRAY_AGG("lon" ORDER BY "ts" DESC))[1],
+        (ARRAY_AGG("alt" ORDER BY "ts" DESC))[1],
+        SUM("lat"), SUM("lon"), COALESCE(SUM("alt"), 0), COUNT("alt")::int,
+        MAX("speed"), MIN("battery"), NOW()
+      FROM (
+        SELECT s.*, TO_TIMESTAMP(FLOOR(EXTRACT(EPOCH FROM s."ts") / ${bucketSec}) * ${bucketSec}) AT TIME ZONE 'UTC' AS "bucket"
+        FROM (${rangeSamples}) s
+      ) b
+      GROUP BY "droneId", "bucket"
+      ON CONFLICT ("droneId", "source", "bucketSec", "bucketStart") DO UPDATE SET
+        "count" = EXCLUDED."count",
+        "firstTs" = EXCLUDED."firstTs", "firstLat" = EXCLUDED."firstLat", "firstLon" = EXCLUDED."firstLon",
+        "lastTs" = EXCLUDED."lastTs", "lastLat" = EXCLUDED."lastLat", "lastLon" = EXCLUDED."lastLon",
+        "lastAltM" = EXCLUDED."lastAltM",
+        "sumLat" = EXCLUDED."sumLat", "sumLon" = EXCLUDED."sumLon",
+        "sumAltM" = EXCLUDED."sumAltM", "altCount" = EXCLUDED."altCount",
+        "maxSpeedMS" = EXCLUDED."maxSpeedMS", "minBatteryPct" = EXCLUDED."minBatteryPct",
+        "updatedAt" = NOW()
+    `;
+  }
+  return written;
+}
@@ -22,18 +22,33 @@ type BroadcastFrameMeta = Omit<FrameMetaPayload, "objects"> & {
   objects: BroadcastFrameObject[];
 };
 
+type PendingFrame = {
+  meta: BroadcastFrameMeta;
+  // resolves with the Frame row id once meta + detections are stored
+  persisted: Promise<bigint>;
+};
+
 type ClientContext = {
   id: string;
   role: Role;
   socket: WebSocket;
-  pendingFrames: BroadcastFrameMeta[];
-  latestPerSource: Map<string, { frameId: number; meta: BroadcastFrameMeta; prismaFrameId?: bigint }>;
+  pendingFrames: PendingFrame[];
   hasBackpressure: boolean;
+  // messages accepted but not yet acked (credit flow control)
+  inFlight: number;
+  skipNextBinary: boolean;
+  // front broadcasts of this sender, chained so they go out in arrival order
+  broadcastTail: Promise<void>;
 };
 
+// Relay to front clients for one message, or undefined when nothing is relayed
+type FrontSend = (() => void) | undefined;
+
 const clients = new Set<ClientContext>();
 const FRONT_BACKPRESSURE_THRESHOLD =
   Number(process.env.WS_FRONT_MAX_BUFFER ?? 2 * 1024 * 1024);
+// Max messages a sender may have in flight (persisting) before it waits for acks
+const PI_CREDIT_WINDOW = Math.max(1, Number(process.env.WS_PI_CREDIT_WINDOW) || 16);
 
 const WS_READY_STATE_OPEN = 1;
 
@@ -44,8 +59,10 @@ export function registerClient(socket: WebSocket, req: FastifyRequest) {
     role,
     socket,
     pendingFrames: [],
-    latestPerSource: new Map(),
     hasBackpressure: false,
+    inFlight: 0,
+    skipNextBinary: false,
+    broadcastTail: Promise.resolve(),
   };
 
   clients.add(ctx);
@@ -55,7 +72,12 @@ export function registerClient(socket: WebSocket, req: FastifyRequest) {
   socket.on("error", () => handleDisconnect(ctx));
   socket.on("message", (data, isBinary) => handleMessage(ctx, data, isBinary));
 
-  safeSend(ctx, JSON.stringify({ type: "hello", role, ok: true }));
+  safeSend(ctx, JSON.stringify({
+    type: "hello",
+    role,
+    ok: true,
+    ...(role !== "front" ? { credit_window: PI_CREDIT_WINDOW } : {}),
+  }));
 }
 
 export function broadcast(payload: unknown) {
@@ -70,7 +92,6 @@ function handleDisconnect(ctx: ClientContext) {
   if (clients.has(ctx)) {
     clients.delete(ctx);
     ctx.pendingFrames.length = 0;
-    ctx.latestPerSource.clear();
     console.log("🔌 WS disconnected", { id: ctx.id, role: ctx.role });
   }
 }
@@ -81,27 +102,56 @@ function handleMessage(ctx: ClientContext, data: RawData, isBinary: boolean) {
     return;
   }
 
-  if (isBinary) {
-    handleBinaryFrame(ctx, data);
+  if (isBinary && ctx.skipNextBinary) {
+    // the meta for this binary was dropped; drop the binary too to keep pairing
+    ctx.skipNextBinary = false;
+    safeSend(ctx, JSON.stringify({ type: "nack", kind: "frame_binary", reason: "meta_dropped" }));
     return;
   }
-
-  const text = typeof data === "string" ? data : data.toString();
-  handleJsonMessage(ctx, text);
+  if (!isBinary) ctx.skipNextBinary = false;
+
+  if (ctx.inFlight >= PI_CREDIT_WINDOW) {
+    // sender ignored its credit window: refuse instead of queueing more DB work
+    console.warn("⚠️ WS credit window exceeded, message dropped", { id: ctx.id, inFlight: ctx.inFlight });
+    if (isBinary) ctx.pendingFrames.shift();
+    else ctx.skipNextBinary = true;
+    safeSend(ctx, JSON.stringify({
+      type: "nack",
+      kind: isBinary ? "frame_binary" : "message",
+      reason: "window_exceeded",
+    }));
+    return;
+  }
+  ctx.inFlight += 1;
+
+  // Messages persist concurrently, but fronts pair a JPEG with the meta sent
+  // just before it, so their relays are sent in the order they arrived
+  const handled = isBinary
+    ? handleBinaryFrame(ctx, data)
+    : handleJsonMessage(ctx, typeof data === "string" ? data : data.toString());
+  const previous = ctx.broadcastTail;
+  ctx.broadcastTail = handled
+    .catch((): FrontSend => undefined)
+    .then(async (send) => {
+      await previous;
+      send?.();
+    });
 }
 
-async function handleBinaryFrame(ctx: ClientContext, data: RawData) {
+async function handleBinaryFrame(ctx: ClientContext, data: RawData): Promise<FrontSend> {
   if (ctx.role !== "pi") {
     console.warn("⚠️ Binary payload from non-pi client dropped", { id: ctx.id });
+    settle(ctx, { kind: "frame_binary", ok: false });
     return;
   }
-  const frame = ctx.pendingFrames.shift();
-  if (!frame) {
+  const pending = ctx.pendingFrames.shift();
+  if (!pending) {
     console.warn("⚠️ Dropped binary frame without pending meta", { id: ctx.id });
+    settle(ctx, { kind: "frame_binary", ok: false });
     return;
   }
 
-  ctx.latestPerSource.delete(frame.source_id);
+  const frame = pending.meta;
   const buffer = toBuffer(data);
   console.log("📦 frame_binary", {
     id: ctx.id,
@@ -110,123 +160,82 @@ async function handleBinaryFrame(ctx: ClientContext, data: RawData) {
     frame_id: frame.frame_id,
     bytes: buffer.length,
   });
+
+  // meta persistence failed -> the meta was never broadcast, so skip the binary too
+  const prismaFrameId = await pending.persisted.catch(() => undefined);
+  if (prismaFrameId === undefined) {
+    settle(ctx, { kind: "frame_binary", ok: false, source_id: frame.source_id, frame_id: frame.frame_id });
+    return;
+  }
+
+  let ok = true;
   try {
-    // Try to find prisma frame id, prefer cached mapping
-    let prismaFrameId = undefined as undefined | bigint;
-    const cached = ctx.latestPerSource.get(frame.source_id);
-    if (cached && cached.frameId === frame.frame_id && cached.prismaFrameId) {
-      prismaFrameId = cached.prismaFrameId;
-    } else {
-      // fallback: look up by (sourceId, frameNo, deviceTs ~ frame.timestamp)
-      const maybe = await prisma.frame.findFirst({
-        where: { sourceId: frame.source_id, frameNo: frame.frame_id },
-        orderBy: { id: "desc" },
-        select: { id: true },
-      });
-      if (maybe) prismaFrameId = maybe.id as unknown as bigint;
-    }
-    if (prismaFrameId) {
-      await (prisma as any).frameBinary.create({
-        data: {
-          frameId: prismaFrameId,
-          mime: "image/jpeg",
-          bytes: buffer,
-          size: buffer.length,
-        },
-        select: { id: true },
-      });
-    }
+    await (prisma as any).frameBinary.create({
+      data: {
+        frameId: prismaFrameId,
+        mime: "image/jpeg",
+        bytes: buffer,
+        size: buffer.length,
+      },
+      select: { id: true },
+    });
   } catch (err: any) {
+    ok = false;
     console.warn("⚠️ failed to store frame binary", { error: err?.message });
   }
 
-  broadcastFrameMetaBinary(frame, buffer);
+  settle(ctx, { kind: "frame_binary", ok, source_id: frame.source_id, frame_id: frame.frame_id });
+  return () => broadcastFrameMetaBinary(frame, buffer);
 }
 
-function handleJsonMessage(ctx: ClientContext, raw: string) {
+async function handleJsonMessage(ctx: ClientContext, raw: string): Promise<FrontSend> {
   let parsed: any;
   try {
     parsed = JSON.parse(raw);
   } catch {
     console.warn("⚠️ Invalid JSON from WS client", { id: ctx.id });
+    settle(ctx, { kind: "unknown", ok: false });
     return;
   }
 
   if (parsed?.kind === "frame_meta") {
-    processFrameMeta(ctx, parsed);
-    return;
+    return processFrameMeta(ctx, parsed);
   }
 
   if (parsed?.kind === "drone_state") {
-    processDroneState(parsed, ctx);
-    return;
+    return processDroneState(parsed, ctx);
   }
 
   console.warn("⚠️ Unsupported WS payload", { id: ctx.id, kind: parsed?.kind });
+  settle(ctx, { kind: "unknown", ok: false });
 }
 
-async function processFrameMeta(ctx: ClientContext, payload: unknown) {
+async function processFrameMeta(ctx: ClientContext, payload: unknown): Promise<FrontSend> {
   if (ctx.role !== "pi") {
     console.warn("⚠️ frame_meta ignored for non-pi client", { id: ctx.id });
+    settle(ctx, { kind: "frame_meta", ok: false });
     return;
   }
+  let meta: FrameMetaPayload;
   try {
-    const meta = frameMetaSchema.parse(payload);
-    // Persist frame and detections
-    const frameId = await saveFrame({
-      frameNo: meta.frame_id,
-      deviceTs: new Date(meta.timestamp),
-      sourceId: meta.source_id,
-      objectsCount: meta.objects.length,
-    });
+    meta = frameMetaSchema.parse(payload);
+  } catch (err: any) {
+    console.warn("⚠️ frame_meta rejected", { id: ctx.id, error: err?.message });
+    settle(ctx, { kind: "frame_meta", ok: false });
+    return;
+  }
 
-    for (const obj of meta.objects) {
-      try {
-        const speed =
-          typeof (obj as any).speed_mps === "number"
-            ? (obj as any).speed_mps
-            : typeof (obj as any).speed_m_s === "number"
-            ? (obj as any).speed_m_s
-            : 0;
-        const detParams: {
-          droneId: string;
-          deviceTs: Date;
-          lat: number;
-          lon: number;
-          altM: number;
-          speedMps: number;
-          sourceId: string;
-          type?: string;
-          confidence?: number;
-          bbox?: [number, number, number, number];
-          frameId?: bigint;
-          rawId?: bigint;
-        } = {
-          droneId: obj.drone_id,
-          deviceTs: obj.timestamp ? new Date(obj.timestamp) : new Date(meta.timestamp),
-          lat: obj.lat,
-          lon: obj.lon,
-          altM: obj.alt_m,
-          speedMps: speed,
-          sourceId: meta.source_id,
-          frameId: BigInt(frameId),
-        };
-        if (typeof obj.type === "string") detParams.type = obj.type;
-        if (typeof obj.confidence === "number") detParams.confidence = obj.confidence;
-        if (obj.bbox) detParams.bbox = obj.bbox as any;
-        await saveDroneDetectionFromFrame(detParams);
-      } catch (e: any) {
-        console.warn("⚠️ save detection failed", { error: e?.message });
-      }
-    }
+  const enriched = enrichFrameMeta(meta);
+  const persisted = persistFrameMeta(meta);
+  // Queue before awaiting the DB so the binary that follows pairs with this meta
+  ctx.pendingFrames.push({ meta: enriched, persisted });
+  if (ctx.pendingFrames.length > PI_CREDIT_WINDOW) {
+    // meta-only senders never claim these; keep the queue bounded
+    ctx.pendingFrames.shift();
+  }
 
-    const enriched = enrichFrameMeta(meta);
-    ctx.pendingFrames.push(enriched);
-    ctx.latestPerSource.set(enriched.source_id, {
-      frameId: enriched.frame_id,
-      meta: enriched,
-      prismaFrameId: BigInt(frameId),
-    });
+  try {
+    await persisted;
 
     console.log("📥 frame_meta", {
       id: ctx.id,
@@ -235,13 +244,67 @@ async function processFrameMeta(ctx: ClientContext, payload: unknown) {
       frame_id: enriched.frame_id,
       objects: enriched.objects.length,
     });
-    broadcastFrameMeta(enriched);
+    settle(ctx, { kind: "frame_meta", ok: true, source_id: meta.source_id, frame_id: meta.frame_id });
+    return () => broadcastFrameMeta(enriched);
   } catch (err: any) {
     console.warn("⚠️ frame_meta rejected", { id: ctx.id, error: err?.message });
+    settle(ctx, { kind: "frame_meta", ok: false, source_id: meta.source_id, frame_id: meta.frame_id });
+  }
+}
+
+// Persist frame and detections; resolves with the Frame row id
+async function persistFrameMeta(meta: FrameMetaPayload): Promise<bigint> {
+  const frameId = await saveFrame({
+    frameNo: meta.frame_id,
+    deviceTs: new Date(meta.timestamp),
+    sourceId: meta.source_id,
+    objectsCount: meta.objects.length,
+  });
+
+  for (const obj of meta.objects) {
+    try {
+      const speed =
+        typeof (obj as any).speed_mps === "number"
+          ? (obj as any).speed_mps
+          : typeof (obj as any).speed_m_s === "number"
+          ? (obj as any).speed_m_s
+          : 0;
+      const detParams: {
+        droneId: string;
+        deviceTs: Date;
+        lat: number;
+        lon: number;
+        altM: number;
+        speedMps: number;
+        sourceId: string;
+        type?: string;
+        confidence?: number;
+        bbox?: [number, number, number, number];
+        frameId?: bigint;
+        rawId?: bigint;
+      } = {
+        droneId: obj.drone_id,
+        deviceTs: obj.timestamp ? new Date(obj.timestamp) : new Date(meta.timestamp),
+        lat: obj.lat,
+        lon: obj.lon,
+        altM: obj.alt_m,
+        speedMps: speed,
+        sourceId: meta.source_id,
+        frameId: BigInt(frameId),
+      };
+      if (typeof obj.type === "string") detParams.type = obj.type;
+      if (typeof obj.confidence === "number") detParams.confidence = obj.confidence;
+      if (obj.bbox) detParams.bbox = obj.bbox as any;
+      await saveDroneDetectionFromFrame(detParams);
+    } catch (e: any) {
+      console.warn("⚠️ save detection failed", { error: e?.message });
+    }
   }
+
+  return BigInt(frameId);
 }
 
-async function processDroneState(payload: unknown, ctx?: ClientContext) {
+async function processDroneState(payload: unknown, ctx?: ClientContext): Promise<FrontSend> {
   try {
     const { kind: _kind, ...state } = droneStateSchema.parse(payload);
     const computed = trackAndComputeSpeed(
@@ -266,7 +329,8 @@ async function processDroneState(payload: unknown, ctx?: ClientContext) {
     } catch (err: any) {
       console.warn("⚠️ persist drone_state failed", { error: err?.message });
     }
-    broadcast({
+    if (ctx) settle(ctx, { kind: "drone_state", ok: true, droneId: state.droneId });
+    return () => broadcast({
       ...state,
       ...(typeof computed === "number" ? { speed_m_s: computed } : {}),
     });
@@ -275,6 +339,7 @@ async function processDroneState(payload: unknown, ctx?: ClientContext) {
       error: err?.message,
       id: ctx?.id,
     });
+    if (ctx) settle(ctx, { kind: "drone_state", ok: false });
   }
 }
 
@@ -293,6 +358,13 @@ function enrichFrameMeta(meta: FrameMetaPayload): BroadcastFrameMeta {
   return { ...meta, objects };
 }
 
+// Release one credit and tell the sender which message finished persisting
+function settle(ctx: ClientContext, ack: Record<string, unknown>) {
+  ctx.inFlight = Math.max(0, ctx.inFlight - 1);
+  if (!clients.has(ctx)) return;
+  safeSend(ctx, JSON.stringify({ type: "ack", ...ack }));
+}
+
 function broadcastFrameMeta(meta: BroadcastFrameMeta) {
   const message = JSON.stringify(meta);
   for (const client of clients) {